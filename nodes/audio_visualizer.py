@@ -7,6 +7,11 @@ import comfy.utils
 import imageio
 from tqdm import tqdm
 
+from ..utils.image_utils import tensor_to_uint8
+
+# Frames converted to uint8 together when writing a video.
+SAVE_CHUNK_FRAMES = 64
+
 # Get the directory of the current script
 current_dir = os.path.dirname(os.path.abspath(__file__))
 visualizers_dir = os.path.join(current_dir, "audio_visualizers")
@@ -65,9 +70,12 @@ class VideoData:
         print(f"🎬 Encoding {total_frames} frames into video")
         save_progress = tqdm(total=total_frames, desc=f"💾 Saving {os.path.basename(filename)}", unit="frame")
 
-        for i, frame in enumerate(self.video):
-            writer.append_data((frame.numpy() * 255).astype(np.uint8))
-            save_progress.update(1)
+        # Convert a chunk of frames at a time, so a long video never needs a
+        # uint8 copy of every frame at once.
+        for chunk in self.video.split(SAVE_CHUNK_FRAMES):
+            for frame in tensor_to_uint8(chunk):
+                writer.append_data(frame)
+                save_progress.update(1)
 
         writer.close()
         save_progress.close()
@@ -4,11 +4,11 @@ Batch Wildcard Sampler — per-batch-index prompt variation for ComfyUI.
 The defining feature: wildcards are resolved independently for every image in the
 batch, so a single run produces a different prompt (and therefore a different
 image) per batch index. Each prompt is encoded through CLIP and sampled on its
-own, then the results are combined into one output batch.
+own, and each result is written into its slot of one preallocated output batch.
 
 This works around ComfyUI's limitation where conditioning tensors must have
 batch dim 1 — instead of stacking conditionings, we loop internally: resolve
-wildcard -> encode CLIP -> sample with batch_size=1 -> collect.
+wildcard -> encode CLIP -> sample with batch_size=1 -> store.
 
 Wildcard resolution is delegated to the WildcardProcessor so the full syntax
 (file wildcards, glob patterns, inline choices, weighted choices, multiple
@@ -20,7 +20,10 @@ needed. Tags are kept in the resolved prompt (for metadata) and stripped before
 the text is sent to CLIP.
 """
 
+import os
 import re
+import time
+import weakref
 
 import torch
 
@@ -31,13 +34,26 @@ import comfy.utils
 
 from .wildcard_processor import WildcardProcessor
 from .lora_tag_loader import LoraTagLoader
+from ..utils.batch_prefetch import OrderedPrefetcher
+from ..utils.batch_resume import (
+    discard_items, has_item, item_key, load_item, prune_items, resume_scope, save_item, upstream_signature,
+)
+from ..utils.batch_timing import PhaseTimings
+from ..utils.lora_stack_cache import fused_stack_read_bytes, stack_signature
 from ..utils.batch_wildcard_runtime import set_batch_prompts
-from ..utils.settings_utils import is_wildcard_console_log_enabled
+from ..utils.cache_utils import LRUCache, file_signature, tensor_nbytes
+from ..utils.settings_utils import is_lora_fused_stack_cache_enabled, is_wildcard_console_log_enabled
 
 
 # Matches <lora:name:strength> tags so they can be stripped before CLIP encoding.
 _LORA_TAG_RE = re.compile(r"<lora:[^>]+>", re.IGNORECASE)
 
+# Encoded prompts, kept on CPU and shared across batch items, the upscale pass
+# and repeat runs. Keyed by the base CLIP, its patch state, the LoRA tags that
+# patched it for this item, and the cleaned prompt text, so an identical
+# negative across a 32-image batch is encoded once instead of 32 times.
+_CONDITIONING_CACHE = LRUCache(max_items=256, max_bytes=512 * 1024 * 1024, size_fn=tensor_nbytes)
+
 
 # Shared wildcard-syntax help, appended to the positive prompt tooltip.
 _WILDCARD_SYNTAX_HELP = (
@@ -65,8 +81,9 @@ class BatchWildcardSampler:
 
     CATEGORY = "⚡ MNeMiC Nodes"
     FUNCTION = "generate_batch"
-    RETURN_TYPES = ("MODEL", "CLIP", "VAE", "CONDITIONING", "CONDITIONING", "LATENT", "STRING")
-    RETURN_NAMES = ("model", "clip", "vae", "positive", "negative", "latent", "prompt")
+    RETURN_TYPES = ("MODEL", "CLIP", "VAE", "CONDITIONING", "CONDITIONING", "LATENT", "STRING", "LATENT", "STRING")
+    RETURN_NAMES = ("model", "clip", "vae", "positive", "negative", "latent", "prompt", "latents", "timings")
+    OUTPUT_IS_LIST = (False, False, False, False, False, False, False, True, False)
     OUTPUT_TOOLTIPS = (
         "The model after LoRA patches from the last batch item have been applied.",
         "The CLIP after LoRA patches from the last batch item have been applied.",
@@ -75,9 +92,20 @@ class BatchWildcardSampler:
         "The negative conditioning encoded from the last batch item's prompt.",
         "The combined batch of sampled latents (empty when sampling is skipped).",
         "The resolved positive prompt for each image, as a list with one entry per batch item.",
+        "The same sampled latents as a list, one single-image latent per batch item. Downstream nodes "
+        "(VAE Decode, savers) then run once per image instead of on the whole batch at once, which keeps "
+        "their peak memory to one image.",
+        "Time spent per phase (resolve, LoRA, encode, sample, upscale) in this run. In dry-run mode, the "
+        "per-image cost estimate instead.",
     )
     OUTPUT_NODE = False
 
+    # "pixel" goes through the VAE; the "latent" methods interpolate the latent
+    # itself with the named comfy.utils.common_upscale method.
+    UPSCALE_METHODS = ["pixel (lanczos)", "latent (bicubic)", "latent (bislerp)", "latent (nearest-exact)"]
+
+    EXECUTION_ORDERS = ["index order", "group by LoRA"]
+
     DESCRIPTION = ("Resolves wildcards independently for every image, but processes them sequentially "
                    "inside the node rather than as a true sampler batch. This still gives per-image "
                    "prompt variation with some workflow speed-ups from staying inside one node. LoRAs can "
@@ -214,6 +242,53 @@ class BatchWildcardSampler:
                     "default": False, "advanced": True,
                     "tooltip": "Force a reload of all wildcard files from disk. Can be disabled again after you have ran it once.",
                 }),
+                "prefetch_items": ("INT", {
+                    "default": 0, "min": 0, "max": 8, "advanced": True,
+                    "tooltip": (
+                        "How many upcoming images to prepare in the background while the current image samples. "
+                        "Preparing means matching and reading the image's LoRA files, so disk reads overlap with "
+                        "sampling. Each prefetched image holds its LoRA files in RAM until it runs. "
+                        "0 = prepare every image inline (no background thread). Results and order are identical "
+                        "either way."
+                    ),
+                }),
+                "execution_order": (cls.EXECUTION_ORDERS, {
+                    "default": "index order", "advanced": True,
+                    "tooltip": (
+                        "Order the images are generated in. 'group by LoRA' runs images with the same LoRA tags "
+                        "back to back (and similar LoRA sets next to each other), so the patched model is reused "
+                        "instead of reloaded for every image. Outputs always stay in index order, and every image "
+                        "is identical to an index-order run."
+                    ),
+                }),
+                "dry_run": ("BOOLEAN", {
+                    "default": False, "advanced": True,
+                    "tooltip": (
+                        "Resolve all prompts and LoRA matches without sampling, and return a per-image cost "
+                        "estimate on the timings output: LoRA bytes to read, cache hits, model reloads caused by "
+                        "LoRA changes between images, and sampling steps."
+                    ),
+                }),
+                "resume_batch": ("BOOLEAN", {
+                    "default": False, "advanced": True,
+                    "tooltip": (
+                        "Save every finished image's latent to a cache folder as soon as it completes. If the batch "
+                        "is interrupted, running it again with the same inputs loads the finished images from disk "
+                        "and only samples the missing ones. The files are removed once the whole batch completes."
+                    ),
+                }),
+                # Appended after the older inputs so the positional widget values of saved
+                # workflows still line up.
+                "upscale_method": (cls.UPSCALE_METHODS, {
+                    "default": "pixel (lanczos)", "advanced": True,
+                    "tooltip": (
+                        "How the first-pass image is enlarged. 'pixel (lanczos)' decodes with the VAE, resizes "
+                        "(or runs the upscale model) and re-encodes: best quality. The 'latent' methods resize the "
+                        "latent directly, skipping the VAE round trip and the upscale model: much faster, but "
+                        "softer, so they need a higher upscale_denoise (around 0.5) to recover detail. Good for "
+                        "preview runs."
+                    ),
+                }),
             },
             "optional": {
                 "model": ("MODEL", {"tooltip": "Optional. Only needed to sample images. Leave disconnected (or leave the latent output unused) to just resolve and preview prompts."}),
@@ -224,22 +299,29 @@ class BatchWildcardSampler:
             "hidden": {
                 "extra_pnginfo": "EXTRA_PNGINFO",
                 "unique_id": "UNIQUE_ID",
+                "prompt": "PROMPT",
             },
         }
 
     def generate_batch(self, text, negative, seed, batch_size, width, height,
                        steps, cfg, sampler_name, scheduler, denoise,
-                       upscale=False, upscale_rate=2.0, upscale_denoise=0.37,
+                       upscale=False, upscale_rate=2.0, upscale_method="pixel (lanczos)",
+                       upscale_denoise=0.37,
                        upscale_steps=20, upscale_cfg=4.0,
                        upscale_sampler_name="(same as first pass)",
                        upscale_scheduler="(same as first pass)",
                        upscale_noise_inject_strength=0.0,
                        recache_wildcards=False,
                        strip_prompt_weights=False,
+                       prefetch_items=0,
+                       execution_order="index order",
+                       dry_run=False,
+                       resume_batch=False,
                        model=None, clip=None, vae=None, upscale_model=None,
-                       extra_pnginfo=None, unique_id=None):
+                       extra_pnginfo=None, unique_id=None, prompt=None):
 
         console_log = is_wildcard_console_log_enabled()
+        timings = PhaseTimings()
 
         # --- Resolve positive and negative prompts for each batch index ---
         # A single processor instance is reused so its file caches persist across
@@ -247,17 +329,18 @@ class BatchWildcardSampler:
         processor = WildcardProcessor()
         positive_prompts = []
         negative_prompts = []
-        for i in range(batch_size):
-            positive_prompts.append(processor.process_wildcards(
-                wildcard_string=text,
-                seed=seed + i,
-                recache_wildcards=(recache_wildcards and i == 0),
-            )[0])
-            negative_prompts.append(processor.process_wildcards(
-                wildcard_string=negative,
-                seed=seed + i,
-                recache_wildcards=False,
-            )[0])
+        with timings.phase("resolve"):
+            for i in range(batch_size):
+                positive_prompts.append(processor.process_wildcards(
+                    wildcard_string=text,
+                    seed=seed + i,
+                    recache_wildcards=(recache_wildcards and i == 0),
+                )[0])
+                negative_prompts.append(processor.process_wildcards(
+                    wildcard_string=negative,
+                    seed=seed + i,
+                    recache_wildcards=False,
+                )[0])
 
         # --- Print summary ---
         if console_log:
@@ -270,6 +353,35 @@ class BatchWildcardSampler:
         # Publish the per-image prompts so Save Image With Metadata can pick them up.
         set_batch_prompts(positive_prompts, negative_prompts, seed)
 
+        # One loader instance, reused across images so its single-LoRA cache persists.
+        lora_loader = LoraTagLoader()
+
+        # --- Resume keys ---
+        # Every item gets a key from everything that decides its output; items
+        # whose latent was saved by an earlier, interrupted run are loaded
+        # instead of sampled. See utils/batch_resume.py.
+        resume_scope_id, resume_keys = None, {}
+        if resume_batch:
+            resume_scope_id, resume_keys = self._resume_keys(
+                lora_loader, prompt, unique_id, positive_prompts, negative_prompts, seed,
+                [width, height, steps, cfg, sampler_name, scheduler, denoise, strip_prompt_weights,
+                 upscale, upscale_rate, upscale_method, upscale_denoise, upscale_steps, upscale_cfg,
+                 upscale_sampler_name, upscale_scheduler, upscale_noise_inject_strength],
+            )
+
+        # --- Dry run: estimate the cost of each item without sampling ---
+        if dry_run:
+            report = self._dry_run_report(
+                lora_loader, positive_prompts, negative_prompts, model, clip, strip_prompt_weights,
+                steps, upscale_steps if upscale and upscale_rate > 1.0 else 0,
+                resume_scope_id, resume_keys, execution_order,
+            )
+            if console_log:
+                print(report + "\n")
+            empty_latent = torch.zeros([batch_size, 4, height // 8, width // 8])
+            return (model, clip, vae, None, None, {"samples": empty_latent}, positive_prompts,
+                    self._latent_list(empty_latent), report)
+
         # --- Decide whether to sample ---
         # Sampling needs a model and clip, AND is skipped entirely when the latent
         # output isn't connected to anything (pure prompt-preview use).
@@ -283,10 +395,15 @@ class BatchWildcardSampler:
                 else:
                     print("  [Batch Wildcard Sampler] No model/clip connected — returning resolved prompts only.\n")
             empty_latent = torch.zeros([batch_size, 4, height // 8, width // 8])
-            return (model, clip, vae, None, None, {"samples": empty_latent}, positive_prompts)
+            return (model, clip, vae, None, None, {"samples": empty_latent}, positive_prompts,
+                    self._latent_list(empty_latent), timings.format("Batch timings (prompts only, nothing sampled)"))
 
         # --- Generate each image individually ---
-        all_samples = []
+        # Each finished latent is written straight into its slot of one output
+        # tensor, allocated once the first item's latent shape is known, instead
+        # of collecting them all and concatenating at the end (which briefly
+        # holds every latent twice).
+        combined = None
         final_model = model
         final_clip = clip
         final_positive = None
@@ -295,190 +412,393 @@ class BatchWildcardSampler:
         # Get the latent format from the model
         latent_format = model.get_model_object("latent_format") if hasattr(model, "get_model_object") else None
 
-        # One loader instance, reused across images so its single-LoRA cache persists.
-        lora_loader = LoraTagLoader()
-
+        # --- Load items finished by an earlier, interrupted run ---
+        # Files left by an unfinished batch with other inputs are removed first.
+        if resume_keys:
+            prune_items(resume_scope_id, resume_keys.values())
+        resumed = {}
+        for i, key in resume_keys.items():
+            cached = load_item(resume_scope_id, key)
+            if cached is not None:
+                resumed[i] = cached
+        resumed_count = len(resumed)
+        if console_log and resumed:
+            print(f"  [Batch Wildcard Sampler] Resuming: {resumed_count}/{batch_size} image(s) "
+                  f"loaded from an earlier run.")
+
+        # --- Execution order ---
+        # Results always land in their index slot, so the run order is free.
+        # With "group by LoRA", an item that directly follows one with the same
+        # LoRA tags reuses that item's patched model/CLIP instead of loading the
+        # LoRAs again. "index order" keeps the reload per item.
+        signatures = [self._lora_signature(lora_loader, p) for p in positive_prompts]
+        run_order = self._execution_order(
+            [i for i in range(batch_size) if i not in resumed], signatures, execution_order,
+        )
+        reuse_previous = set()
+        if execution_order == "group by LoRA":
+            reuse_previous = {
+                b for a, b in zip(run_order, run_order[1:]) if signatures[a] and signatures[a] == signatures[b]
+            }
+        if console_log and execution_order != "index order":
+            print(f"  [Batch Wildcard Sampler] Execution order ({execution_order}): {run_order}")
+
+        # --- Pre-encode every prompt that runs on the unpatched CLIP ---
+        # Items without LoRA tags all share the input CLIP, so their prompts are
+        # tokenized and encoded together up front, while the CLIP is loaded once,
+        # instead of swapping CLIP and model in and out for every item.
+        shared_texts = []
         for i in range(batch_size):
-            # Apply any <lora:...> tags from this image's positive prompt to fresh
-            # clones of the model/clip. load_lora returns the model/clip with the
-            # LoRAs applied and the prompt cleaned of its tags for CLIP encoding.
-            model_i, clip_i, clean_positive = lora_loader.load_lora(
-                model, clip, positive_prompts[i]
-            )
-            final_model, final_clip = model_i, clip_i
-            # The negative prompt is not used to load LoRAs, but strip any tags so
-            # they are never sent to CLIP as text.
-            clean_negative = _LORA_TAG_RE.sub("", negative_prompts[i])
-
-            if strip_prompt_weights:
-                clean_positive = self._strip_weight_syntax(clean_positive)
-                clean_negative = self._strip_weight_syntax(clean_negative)
-
-            # Encode this image's positive and negative prompts through the (LoRA-applied) CLIP
-            positive = self._encode(clip_i, clean_positive)
-            negative_cond = self._encode(clip_i, clean_negative)
-            # Exposed on the outputs (from the last batch item, like model/clip).
-            final_positive, final_negative = positive, negative_cond
-
-            # Create empty latent for this single image
-            if latent_format is not None:
-                latent_image = torch.zeros([1, latent_format.latent_channels, height // 8, width // 8], device="cpu")
+            if i not in resumed and not self._lora_signature(lora_loader, positive_prompts[i]):
+                shared_texts.extend(self._clip_texts(
+                    re.sub(lora_loader.tag_pattern, "", positive_prompts[i]),
+                    negative_prompts[i], strip_prompt_weights,
+                ))
+        with timings.phase("encode"):
+            encoded = self._encode_batch(clip, shared_texts)
+        if console_log and shared_texts:
+            print(f"  [Batch Wildcard Sampler] Pre-encoded {encoded} unique prompt(s) "
+                  f"for {len(shared_texts)} text(s) using the unpatched CLIP.")
+
+        # --- Prefetch upcoming items while the current one samples ---
+        # A worker thread matches and reads the LoRA files of the next
+        # `prefetch_items` items. Tokenizing (the tokenizers are not
+        # thread-safe), patching, encoding and sampling stay on this thread, so
+        # results and order are unchanged.
+        def prepare_item(i):
+            if not signatures[i] or i in reuse_previous:
+                return None  # Pre-encoded on the unpatched CLIP, or reusing the previous item's LoRAs.
+            return lora_loader.prepare_lora_stack(positive_prompts[i], model, clip, console_log)
+
+        # --- Upscale second pass settings ---
+        # When upscale is on (and the rate is above 1), each image's latent is
+        # upscaled and sampled again at the larger resolution. The upscale pass
+        # uses its own denoise, and optionally its own steps/cfg/sampler/scheduler
+        # (each falls back to the first-pass value when left at its default).
+        latent_upscale = upscale_method.startswith("latent")
+        if upscale and upscale_rate > 1.0 and vae is None and not latent_upscale:
+            print("  [Batch Wildcard Sampler] upscale is on but no VAE is connected — "
+                  "the upscale pass needs a VAE to upscale in pixel space. Skipping the upscale pass.")
+        do_upscale = upscale and upscale_rate > 1.0 and (vae is not None or latent_upscale)
+
+        def upscale_latents(samples, model_i):
+            started = time.perf_counter()
+            if latent_upscale:
+                upscaled = self._run_latent_upscale(
+                    samples, upscale_width / width, upscale_height / height,
+                    upscale_method[len("latent ("):-1], model_i,
+                )
             else:
-                latent_image = torch.zeros([1, 4, height // 8, width // 8], device="cpu")
-
-            latent_image = comfy.sample.fix_empty_latent_channels(model_i, latent_image)
+                upscaled = self._run_upscale(
+                    samples, upscale_width, upscale_height, vae, upscale_model, model_i,
+                )
+            if console_log:
+                print(f"  [Batch Wildcard Sampler] {upscale_method} upscale of {samples.shape[0]} image(s) "
+                      f"took {time.perf_counter() - started:.2f}s")
+            return upscaled
+        upscale_width = (int(round(width * upscale_rate)) // 8) * 8
+        upscale_height = (int(round(height * upscale_rate)) // 8) * 8
+        eff_steps = upscale_steps
+        eff_cfg = upscale_cfg if upscale_cfg > 0 else cfg
+        eff_sampler = sampler_name if upscale_sampler_name == "(same as first pass)" else upscale_sampler_name
+        eff_scheduler = scheduler if upscale_scheduler == "(same as first pass)" else upscale_scheduler
+        deferred_upscales = []
+
+        # The upscale sigma schedule only depends on the (shared) model sampling,
+        # scheduler, steps and denoise, so it's computed once for the batch.
+        inject_sigmas = None
+        if do_upscale and upscale_noise_inject_strength > 0.0:
+            inject_sigmas = self._noise_inject_sigmas(model, eff_scheduler, eff_steps, upscale_denoise)
+            if console_log:
+                print(f"  [Batch Wildcard Sampler] Upscale noise inject: strength={upscale_noise_inject_strength:.3f}, "
+                      f"σ_start={inject_sigmas[0]:.4f}, σ_end={inject_sigmas[-1]:.4f}, "
+                      f"active_steps={len(inject_sigmas) - 1}")
 
-            # Generate noise with unique seed per image
+        def run_upscale_pass(i, model_i, upscaled, positive, negative_cond):
             image_seed = seed + i
-            noise = comfy.sample.prepare_noise(latent_image, image_seed)
-
-            # Sample with the (LoRA-applied) model
             if console_log:
-                print(f"  [Batch Wildcard Sampler] Sampling image {i + 1}/{batch_size}: seed={image_seed}")
-            samples = comfy.sample.sample(
-                model_i, noise, steps, cfg,
-                sampler_name, scheduler,
+                print(f"  [Batch Wildcard Sampler] Upscale pass {i + 1}/{batch_size}: "
+                      f"{width}x{height} -> {upscale_width}x{upscale_height} "
+                      f"(rate={upscale_rate}, denoise={upscale_denoise}, steps={eff_steps}, cfg={eff_cfg}, "
+                      f"sampler={eff_sampler}, scheduler={eff_scheduler})")
+
+            # Noise is injected exactly as in the first pass: unit Gaussian noise
+            # from prepare_noise(), with the sampler scaling it by the starting
+            # sigma implied by upscale_denoise. Same seed as the first pass.
+            upscale_noise = comfy.sample.prepare_noise(upscaled, image_seed)
+
+            # Build per-step noise injection callback. When strength > 0 the
+            # callback fires at every denoising step and adds noise × σ_i ×
+            # strength, so injection is heaviest early and tapers to near-zero
+            # as the sampler converges. None means no extra noise.
+            noise_inject_cb = None
+            if inject_sigmas is not None:
+                noise_inject_cb = self._make_noise_inject_callback(
+                    upscale_noise_inject_strength, inject_sigmas, image_seed,
+                )
+
+            # The upscale pass uses the SAME positive/negative conditioning that
+            # was encoded from this image's resolved prompt — identical to what
+            # drove the first pass. This is intentional: the upscale is a guided
+            # hi-res refinement, not an unconditional diffusion step.
+            return comfy.sample.sample(
+                model_i, upscale_noise, eff_steps, eff_cfg,
+                eff_sampler, eff_scheduler,
                 positive, negative_cond,
-                latent_image,
-                denoise=denoise,
+                upscaled,
+                denoise=upscale_denoise,
                 seed=image_seed,
+                callback=noise_inject_cb,
             )
 
-            # --- Optional upscale second pass ---
-            # When upscale is on (and the rate is above 1), upscale this image's
-            # latent and sample it again at the larger resolution. The upscale pass
-            # uses its own denoise, and optionally its own steps/cfg/sampler/scheduler
-            # (each falls back to the first-pass value when left at its default).
-            if upscale and upscale_rate > 1.0 and vae is None:
-                print("  [Batch Wildcard Sampler] upscale is on but no VAE is connected — "
-                      "the upscale pass needs a VAE to upscale in pixel space. Skipping the upscale pass.")
-
-            if upscale and upscale_rate > 1.0 and vae is not None:
-                upscale_width = (int(round(width * upscale_rate)) // 8) * 8
-                upscale_height = (int(round(height * upscale_rate)) // 8) * 8
+        def store_sample(i, samples, spill=True):
+            nonlocal combined
+            if combined is None:
+                combined = torch.empty((batch_size,) + tuple(samples.shape[1:]),
+                                       dtype=samples.dtype, device=samples.device)
+            combined[i:i + 1].copy_(samples)
+            if spill and i in resume_keys:
+                save_item(resume_scope_id, resume_keys[i], samples, {
+                    "prompt": positive_prompts[i],
+                    "negative": negative_prompts[i],
+                    "seed": seed + i,
+                    "loras": list(self._lora_signature(lora_loader, positive_prompts[i])),
+                })
+
+        for i, cached in resumed.items():
+            store_sample(i, cached, spill=False)
+        resumed.clear()
+
+        model_i, clip_i = model, clip
+        final_index = -1
+        with OrderedPrefetcher(run_order, prepare_item, depth=prefetch_items) as items:
+            for position, (i, prepared) in enumerate(items):
+                # Apply any <lora:...> tags from this image's positive prompt to fresh
+                # clones of the model/clip. load_lora returns the model/clip with the
+                # LoRAs applied and the prompt cleaned of its tags for CLIP encoding.
+                # Right after an item with the same tags, its clones are reused as-is.
+                with timings.phase("lora"):
+                    if i in reuse_previous:
+                        clean_positive = re.sub(lora_loader.tag_pattern, "", positive_prompts[i])
+                    else:
+                        model_i, clip_i, clean_positive = lora_loader.load_lora(
+                            model, clip, positive_prompts[i],
+                            prepared=prepared,
+                        )
+                # The model/clip/conditioning outputs come from the highest index.
+                is_final = i > final_index
+                if is_final:
+                    final_index = i
+                    final_model, final_clip = model_i, clip_i
+                clean_positive, clean_negative = self._clip_texts(
+                    clean_positive, negative_prompts[i], strip_prompt_weights,
+                )
 
-                eff_steps = upscale_steps
-                eff_cfg = upscale_cfg if upscale_cfg > 0 else cfg
-                eff_sampler = sampler_name if upscale_sampler_name == "(same as first pass)" else upscale_sampler_name
-                eff_scheduler = scheduler if upscale_scheduler == "(same as first pass)" else upscale_scheduler
+                # Encode this image's positive and negative prompts through the (LoRA-applied) CLIP.
+                # Items with the same CLIP patch state and text reuse one cached encode.
+                lora_key = () if clip_i is clip else self._lora_stack_key(lora_loader, positive_prompts[i])
+                with timings.phase("encode"):
+                    positive = self._encode(clip_i, clean_positive, clip, lora_key)
+                    negative_cond = self._encode(clip_i, clean_negative, clip, lora_key)
+                # Exposed on the outputs (from the last batch item, like model/clip).
+                if is_final:
+                    final_positive, final_negative = positive, negative_cond
+
+                # Create empty latent for this single image
+                if latent_format is not None:
+                    latent_image = torch.zeros([1, latent_format.latent_channels, height // 8, width // 8], device="cpu")
+                else:
+                    latent_image = torch.zeros([1, 4, height // 8, width // 8], device="cpu")
 
-                if console_log:
-                    print(f"  [Batch Wildcard Sampler] Upscale pass {i + 1}/{batch_size}: "
-                          f"{width}x{height} -> {upscale_width}x{upscale_height} "
-                          f"(rate={upscale_rate}, denoise={upscale_denoise}, steps={eff_steps}, cfg={eff_cfg}, "
-                          f"sampler={eff_sampler}, scheduler={eff_scheduler})")
+                latent_image = comfy.sample.fix_empty_latent_channels(model_i, latent_image)
 
-                upscaled = self._run_upscale(
-                    samples, upscale_width, upscale_height, vae, upscale_model, model_i,
-                )
+                # Generate noise with unique seed per image
+                image_seed = seed + i
+                noise = comfy.sample.prepare_noise(latent_image, image_seed)
 
-                # Noise is injected exactly as in the first pass: unit Gaussian noise
-                # from prepare_noise(), with the sampler scaling it by the starting
-                # sigma implied by upscale_denoise. Same seed as the first pass.
-                upscale_noise = comfy.sample.prepare_noise(upscaled, image_seed)
-
-                # Build per-step noise injection callback. When strength > 0 the
-                # callback fires at every denoising step and adds noise × σ_i ×
-                # strength, so injection is heaviest early and tapers to near-zero
-                # as the sampler converges. None means no extra noise.
-                noise_inject_cb = None
-                if upscale_noise_inject_strength > 0.0:
-                    noise_inject_cb = self._make_noise_inject_callback(
-                        upscale_noise_inject_strength,
-                        upscale_denoise, eff_scheduler, eff_steps,
-                        model_i, image_seed, console_log,
+                # Sample with the (LoRA-applied) model
+                if console_log:
+                    print(f"  [Batch Wildcard Sampler] Sampling image {i + 1}/{batch_size}: seed={image_seed}")
+                with timings.phase("sample"):
+                    samples = comfy.sample.sample(
+                        model_i, noise, steps, cfg,
+                        sampler_name, scheduler,
+                        positive, negative_cond,
+                        latent_image,
+                        denoise=denoise,
+                        seed=image_seed,
                     )
 
-                # The upscale pass uses the SAME positive/negative conditioning that
-                # was encoded from this image's resolved prompt above — identical to
-                # what drove the first pass. This is intentional: the upscale is a
-                # guided hi-res refinement, not an unconditional diffusion step.
-                samples = comfy.sample.sample(
-                    model_i, upscale_noise, eff_steps, eff_cfg,
-                    eff_sampler, eff_scheduler,
-                    positive, negative_cond,
-                    upscaled,
-                    denoise=upscale_denoise,
-                    seed=image_seed,
-                    callback=noise_inject_cb,
-                )
-
-            all_samples.append(samples)
+                # --- Optional upscale second pass ---
+                # Items that run on the unpatched model share all model state, so
+                # their upscale is deferred and done as one batch after the loop.
+                # LoRA items are upscaled right away, before their clone is unloaded.
+                # With resume on, every item is upscaled right away so its finished
+                # latent is saved before the next item starts.
+                if do_upscale:
+                    if model_i is model and clip_i is clip and not resume_keys:
+                        deferred_upscales.append((i, samples, positive, negative_cond))
+                        samples = None
+                    else:
+                        with timings.phase("upscale"):
+                            upscaled = upscale_latents(samples, model_i)
+                        with timings.phase("hires"):
+                            samples = run_upscale_pass(i, model_i, upscaled, positive, negative_cond)
+
+                if samples is not None:
+                    store_sample(i, samples)
+                    del samples
+
+                # --- Clean model state between batch items ---
+                # When this item loaded a LoRA, load_lora returned a *clone* of the
+                # base model that shares the same underlying weights. ComfyUI patches
+                # those shared weights in place and keeps the model resident, so the
+                # next item's clone can end up patching on top of weights that were
+                # never cleanly reverted — they drift into NaNs and the image decodes
+                # as pure black (randomly, depending on VRAM/offload timing). Fully
+                # unloading here forces the next item to re-patch from clean base
+                # weights. Only done when a clone was actually created, so the
+                # no-LoRA path keeps reusing the same model with no reload cost,
+                # and deferred while the next item reuses this same clone.
+                next_index = run_order[position + 1] if position + 1 < len(run_order) else None
+                if (model_i is not model or clip_i is not clip) and next_index not in reuse_previous:
+                    comfy.model_management.unload_all_models()
+
+        # --- Batched upscale for the items on the shared model ---
+        # One VAE decode, resize and encode per group (and one upscale model
+        # load) instead of swapping VAE/upscale model in and out per item. The
+        # groups are sized so their pixel buffers stay within a memory budget,
+        # and halved if they still run out of memory.
+        if deferred_upscales:
+            chunk = self._upscale_chunk_size(
+                width, height, upscale_width, upscale_height, upscale_model, latent_upscale,
+            )
+            if console_log:
+                print(f"  [Batch Wildcard Sampler] Upscaling {len(deferred_upscales)} image(s) "
+                      f"on the unpatched model in groups of up to {chunk}.")
+            start = 0
+            while start < len(deferred_upscales):
+                group = deferred_upscales[start:start + chunk]
+                try:
+                    with timings.phase("upscale"):
+                        upscaled = upscale_latents(torch.cat([d[1] for d in group], dim=0), model)
+                except comfy.model_management.OOM_EXCEPTION:
+                    if chunk == 1:
+                        raise
+                    chunk //= 2
+                    comfy.model_management.soft_empty_cache()
+                    continue
+                for j, (i, _, positive, negative_cond) in enumerate(group):
+                    with timings.phase("hires"):
+                        samples = run_upscale_pass(i, model, upscaled[j:j + 1], positive, negative_cond)
+                    store_sample(i, samples)
+                del upscaled
+                start += len(group)
+            deferred_upscales.clear()
+
+        # --- Outputs for a resumed last item ---
+        # The model/clip/conditioning outputs come from the highest index. When
+        # its latent was loaded from disk it never ran above, so its LoRAs are
+        # applied and its prompts encoded here, as a full run would have.
+        last = batch_size - 1
+        if final_index != last:
+            with timings.phase("lora"):
+                final_model, final_clip, clean_positive = lora_loader.load_lora(model, clip, positive_prompts[last])
+            clean_positive, clean_negative = self._clip_texts(
+                clean_positive, negative_prompts[last], strip_prompt_weights,
+            )
+            lora_key = () if final_clip is clip else self._lora_stack_key(lora_loader, positive_prompts[last])
+            with timings.phase("encode"):
+                final_positive = self._encode(final_clip, clean_positive, clip, lora_key)
+                final_negative = self._encode(final_clip, clean_negative, clip, lora_key)
 
-            # --- Clean model state between batch items ---
-            # When this item loaded a LoRA, load_lora returned a *clone* of the
-            # base model that shares the same underlying weights. ComfyUI patches
-            # those shared weights in place and keeps the model resident, so the
-            # next item's clone can end up patching on top of weights that were
-            # never cleanly reverted — they drift into NaNs and the image decodes
-            # as pure black (randomly, depending on VRAM/offload timing). Fully
-            # unloading here forces the next item to re-patch from clean base
-            # weights. Only done when a clone was actually created, so the
-            # no-LoRA path keeps reusing the same model with no reload cost.
-            if model_i is not model or clip_i is not clip:
-                comfy.model_management.unload_all_models()
+        # The whole batch is done, so its resume files are no longer needed.
+        if resume_keys:
+            discard_items(resume_scope_id, resume_keys.values())
 
-        # --- Combine all results into one batch ---
-        combined = torch.cat(all_samples, dim=0)
+        title = f"Batch timings ({batch_size} image(s)"
+        title += f", {resumed_count} resumed)" if resumed_count else ")"
+        timing_report = timings.format(title)
 
         if console_log:
             print(f"\n  [Batch Wildcard Sampler] Batch complete — {batch_size} images generated.")
+            print(timing_report)
             print(f"{'='*60}\n")
-
         return (final_model, final_clip, vae, final_positive, final_negative,
-                {"samples": combined}, positive_prompts)
+                {"samples": combined}, positive_prompts, self._latent_list(combined), timing_report)
+
+    @staticmethod
+    def _latent_list(samples):
+        """Split a batch latent into per-image latents (views, no copies)."""
+        return [{"samples": samples[i:i + 1]} for i in range(samples.shape[0])]
 
     @staticmethod
-    def _make_noise_inject_callback(strength, denoise, scheduler, steps, model_i, seed, console_log=False):
+    def _noise_inject_sigmas(model, scheduler, steps, denoise):
         """
-        Returns a per-step callback for comfy.sample.sample that injects
-        scheduler-scaled Gaussian noise at every denoising step.
+        The sigmas the upscale pass actually steps through, as plain floats.
+        Computed once per batch: LoRA clones share the base model's
+        model_sampling, so every item sees the same schedule.
 
-        At step i the injected magnitude is strength × σ_i, so injection is
-        heaviest at the start (large sigma) and tapers to near-zero as the
-        sampler converges (sigma → 0). The noise is seeded deterministically
-        per step (seed + step) for reproducibility.
+        The schedule is sliced to the steps actually taken given the denoise
+        level so that callback step 0 aligns with the sampler's first real sigma.
         """
-        model_sampling = model_i.get_model_object("model_sampling")
+        model_sampling = model.get_model_object("model_sampling")
         device = comfy.model_management.get_torch_device()
         try:
             sigmas = comfy.samplers.calculate_sigmas(model_sampling, scheduler, steps, device)
         except TypeError:
             sigmas = comfy.samplers.calculate_sigmas(model_sampling, scheduler, steps)
 
-        # Slice to the steps actually taken given the denoise level so that
-        # callback step 0 aligns with the sampler's first real sigma.
         n = len(sigmas)
         start_idx = max(0, min(int(n * (1.0 - denoise)), n - 2))
-        active_sigmas = sigmas[start_idx:]
+        return sigmas[start_idx:].tolist()
 
-        if console_log:
-            print(f"  [Batch Wildcard Sampler] Upscale noise inject: strength={strength:.3f}, "
-                  f"σ_start={active_sigmas[0].item():.4f}, σ_end={active_sigmas[-1].item():.4f}, "
-                  f"active_steps={len(active_sigmas) - 1}")
+    @staticmethod
+    def _make_noise_inject_callback(strength, active_sigmas, seed):
+        """
+        Returns a per-step callback for comfy.sample.sample that injects
+        scheduler-scaled Gaussian noise at every denoising step.
+
+        At step i the injected magnitude is strength × σ_i, so injection is
+        heaviest at the start (large sigma) and tapers to near-zero as the
+        sampler converges (sigma → 0). The noise is seeded deterministically
+        per step (seed + step) for reproducibility.
+
+        One generator and one noise buffer are reused for every step: the
+        generator is reseeded and the buffer refilled in place with normal_,
+        which draws exactly the values torch.randn would for the same seed.
+        """
+        state = {"generator": None, "buffer": None}
 
         def callback(step, x0, x, total_steps):
-            if step < len(active_sigmas) - 1:
-                sigma_i = active_sigmas[step].item()
-                gen = torch.Generator(device=x.device)
-                gen.manual_seed(seed + step)
-                noise_i = torch.randn(x.shape, generator=gen, device=x.device, dtype=x.dtype)
-                x.add_(noise_i * (sigma_i * strength))
+            if step >= len(active_sigmas) - 1:
+                return
+            buffer = state["buffer"]
+            if buffer is None or buffer.shape != x.shape or buffer.dtype != x.dtype or buffer.device != x.device:
+                state["generator"] = torch.Generator(device=x.device)
+                buffer = state["buffer"] = torch.empty_like(x)
+            state["generator"].manual_seed(seed + step)
+            buffer.normal_(generator=state["generator"])
+            x.add_(buffer, alpha=active_sigmas[step] * strength)
 
         return callback
 
     def _run_upscale(self, samples, upscale_width, upscale_height, vae, upscale_model, model_i):
         """
-        Enlarge the first-pass latent for the upscale second pass, entirely in
+        Enlarge first-pass latents for the upscale second pass, entirely in
         PIXEL space: decode the latent to an image, Lanczos-resize it (exactly like
         the native "Upscale Image" node), then re-encode. This preserves the
-        picture, so a low upscale denoise is enough. No latent-space upscaling.
+        picture, so a low upscale denoise is enough. The faster latent-space
+        methods are in _run_latent_upscale.
 
         Works for ordinary image VAEs (decode -> 4D [B,H,W,C]) and for image VAEs
         that are internally 3D, such as Qwen-Image / Wan (decode -> 5D
         [B,T,H,W,C]). The image is always reduced to a flat 4D batch of NHWC frames
         before encoding, so the VAE wrapper does its own correct 4D -> native-rank
         conversion (feeding it a hand-built 5D tensor bypasses that and breaks).
+
+        `samples` may hold several images; they go through decode, resize and
+        encode together and come back in the same batch order.
         """
         console_log = is_wildcard_console_log_enabled()
 
@@ -517,17 +837,93 @@ class BatchWildcardSampler:
         return comfy.sample.fix_empty_latent_channels(model_i, upscaled)
 
     @staticmethod
-    def _upscale_with_model(upscale_model, image):
-        """Run an UPSCALE_MODEL (e.g. ESRGAN) over a pixel image (NHWC, 0..1)."""
+    def _run_latent_upscale(samples, scale_x, scale_y, method, model_i):
+        """
+        Enlarge first-pass latents directly in LATENT space with one of
+        comfy.utils.common_upscale's methods (bicubic, bislerp, nearest-exact).
+        No VAE decode/encode and no upscale model, so it costs almost nothing,
+        but the result is softer than the pixel path and needs more denoise.
+
+        The target size is scaled from the latent's own size, so it works for
+        any VAE compression factor. 5D latents [B,C,T,H,W] are resized frame by
+        frame by folding the temporal axis into the batch.
+        """
+        target_w = max(1, int(round(samples.shape[-1] * scale_x)))
+        target_h = max(1, int(round(samples.shape[-2] * scale_y)))
+        if samples.ndim == 5:
+            b, c, t, h, w = samples.shape
+            frames = samples.movedim(2, 1).reshape(b * t, c, h, w)
+            frames = comfy.utils.common_upscale(frames, target_w, target_h, method, "disabled")
+            upscaled = frames.reshape(b, t, c, target_h, target_w).movedim(1, 2)
+        else:
+            upscaled = comfy.utils.common_upscale(samples, target_w, target_h, method, "disabled")
+        return comfy.sample.fix_empty_latent_channels(model_i, upscaled.contiguous())
+
+    # Upper bound on the pixel buffers (decoded, model-upscaled and resized
+    # images) of one batched upscale group. A quarter of the free RAM is used
+    # when that is less.
+    UPSCALE_GROUP_MAX_BYTES = 1024 ** 3
+
+    @classmethod
+    def _upscale_chunk_size(cls, width, height, upscale_width, upscale_height, upscale_model, latent_upscale):
+        """How many images one batched upscale group may hold."""
+        if latent_upscale:
+            per_image = upscale_width * upscale_height  # Upscaled latent: up to 16 float32 channels at 1/8 size.
+        else:
+            model_scale = max(getattr(upscale_model, "scale", 1.0), 1.0) if upscale_model is not None else 1.0
+            pixels = width * height * (1 + model_scale * model_scale) + upscale_width * upscale_height
+            per_image = int(pixels * 3 * 4)  # float32 RGB
+        free = comfy.model_management.get_free_memory(torch.device("cpu"))
+        budget = min(cls.UPSCALE_GROUP_MAX_BYTES, free // 4)
+        return max(1, budget // max(per_image, 1))
+
+    # Tile sizes tried for the upscale model, largest first. Bigger tiles mean
+    # fewer forward passes and less overlap work, but need more free memory.
+    UPSCALE_TILE_SIZES = (1024, 768, 512, 384, 256, 128)
+
+    @classmethod
+    def _pick_upscale_tile(cls, upscale_model, image, device):
+        """
+        Largest tile whose estimated working memory fits in the free memory on
+        `device`, using the same per-pixel estimate as ComfyUI's own
+        ImageUpscaleWithModel node.
+        """
+        free = comfy.model_management.get_free_memory(device)
+        per_pixel = 3 * image.element_size() * max(upscale_model.scale, 1.0) * 384.0
+        for tile in cls.UPSCALE_TILE_SIZES:
+            if tile * tile * per_pixel <= free:
+                return tile
+        return cls.UPSCALE_TILE_SIZES[-1]
+
+    @classmethod
+    def _upscale_with_model(cls, upscale_model, image):
+        """
+        Run an UPSCALE_MODEL (e.g. ESRGAN) over a batch of pixel images (NHWC,
+        0..1). The model is moved to the device once for the whole batch; the
+        tile size is picked from free memory and halved on out-of-memory.
+        """
         device = comfy.model_management.get_torch_device()
+        memory_required = comfy.model_management.module_size(upscale_model.model)
+        memory_required += image.nelement() * image.element_size()
+        comfy.model_management.free_memory(memory_required, device)
+
         upscale_model.to(device)
         in_img = image.movedim(-1, -3).to(device)  # NHWC -> NCHW
+        tile = cls._pick_upscale_tile(upscale_model, image, device)
         try:
-            upscaled = comfy.utils.tiled_scale(
-                in_img, lambda a: upscale_model(a),
-                tile_x=512, tile_y=512, overlap=32,
-                upscale_amount=upscale_model.scale,
-            )
+            while True:
+                try:
+                    upscaled = comfy.utils.tiled_scale(
+                        in_img, lambda a: upscale_model(a),
+                        tile_x=tile, tile_y=tile, overlap=32,
+                        upscale_amount=upscale_model.scale,
+                    )
+                    break
+                except comfy.model_management.OOM_EXCEPTION:
+                    tile //= 2
+                    if tile < cls.UPSCALE_TILE_SIZES[-1]:
+                        raise
+                    comfy.model_management.soft_empty_cache()
         finally:
             upscale_model.to("cpu")
         return torch.clamp(upscaled.movedim(-3, -1), min=0.0, max=1.0)  # NCHW -> NHWC
@@ -536,9 +932,9 @@ class BatchWildcardSampler:
     def _latent_output_connected(extra_pnginfo, unique_id):
         """
         Inspect the workflow graph to determine whether this node's `latent`
-        output is connected to anything.
+        or `latents` output is connected to anything.
 
-        The output slot is resolved from RETURN_NAMES so this keeps working if
+        The output slots are resolved from RETURN_NAMES so this keeps working if
         outputs are reordered later.
 
         Returns True/False when it can be determined, or None when the graph
@@ -549,8 +945,11 @@ class BatchWildcardSampler:
             if not extra_pnginfo or unique_id is None:
                 return None
 
-            # Resolve the current latent slot from the declared output order.
-            latent_slot = BatchWildcardSampler.RETURN_NAMES.index("latent")
+            # Resolve the current latent slots from the declared output order.
+            latent_slots = {
+                BatchWildcardSampler.RETURN_NAMES.index("latent"),
+                BatchWildcardSampler.RETURN_NAMES.index("latents"),
+            }
 
             # EXTRA_PNGINFO is normally {"workflow": {...}}; tolerate a bare workflow too.
             workflow = extra_pnginfo.get("workflow") if isinstance(extra_pnginfo, dict) else None
@@ -565,7 +964,7 @@ class BatchWildcardSampler:
             for link in links:
                 # litegraph link: [link_id, origin_id, origin_slot, target_id, target_slot, type]
                 if isinstance(link, (list, tuple)) and len(link) >= 3:
-                    if str(link[1]) == node_id and link[2] == latent_slot:
+                    if str(link[1]) == node_id and link[2] in latent_slots:
                         return True
             return False
         except Exception:
@@ -587,12 +986,255 @@ class BatchWildcardSampler:
             text = replaced
         return text
 
+    @classmethod
+    def _clip_texts(cls, clean_positive, negative, strip_prompt_weights):
+        """The positive/negative text exactly as it is sent to CLIP."""
+        # The negative prompt is not used to load LoRAs, but strip any tags so
+        # they are never sent to CLIP as text.
+        clean_negative = _LORA_TAG_RE.sub("", negative)
+        if strip_prompt_weights:
+            clean_positive = cls._strip_weight_syntax(clean_positive)
+            clean_negative = cls._strip_weight_syntax(clean_negative)
+        return clean_positive, clean_negative
+
+    @classmethod
+    def _encode_batch(cls, clip, prompts, lora_key=()):
+        """
+        Tokenize and encode a group of prompts that share one CLIP patch state,
+        storing each unique prompt in the conditioning cache. All prompts are
+        tokenized first, then encoded back to back with the CLIP loaded once.
+
+        Each prompt still gets its own encode_from_tokens call: ComfyUI's CLIP
+        API joins all chunks it is given into one sequence and only returns the
+        pooled output of the first chunk, so packing several prompts into a
+        single call would corrupt the pooled conditioning (SDXL, Flux) and
+        variable-length T5 tokens. Returns the number of prompts encoded.
+        """
+        pending = []
+        for prompt in dict.fromkeys(prompts):
+            if _CONDITIONING_CACHE.get(cls._conditioning_cache_key(clip, lora_key, prompt)) is None:
+                pending.append(prompt)
+        if not pending:
+            return 0
+
+        tokenized = [(prompt, clip.tokenize(prompt)) for prompt in pending]
+        if hasattr(clip, "load_model"):
+            clip.load_model()
+        for prompt, tokens in tokenized:
+            cls._encode(clip, prompt, clip, lora_key, tokens=tokens)
+        return len(tokenized)
+
+    @staticmethod
+    def _resume_keys(lora_loader, prompt, unique_id, positive_prompts, negative_prompts, seed, settings):
+        """
+        (scope, resume-cache key per item index). The scope groups the files of
+        this sampler node and upstream graph. Returns (None, {}) when the run
+        can't be identified.
+        """
+        upstream = upstream_signature(prompt, unique_id)
+        if upstream is None:
+            print("  [Batch Wildcard Sampler] resume_batch is on but the workflow prompt is unavailable, "
+                  "so runs can't be told apart. Resume is skipped for this run.")
+            return None, {}
+        keys = {}
+        for i, positive in enumerate(positive_prompts):
+            loras = BatchWildcardSampler._lora_stack_key(lora_loader, positive)
+            keys[i] = item_key(upstream, settings, positive, negative_prompts[i], seed + i, loras)
+        return resume_scope(unique_id, upstream), keys
+
+    @staticmethod
+    def _execution_order(indices, signatures, execution_order):
+        """
+        The order to run `indices` in. "group by LoRA" runs items with the same
+        LoRA signature back to back, starting with the LoRA-free group, then
+        chains the groups nearest-neighbour: each next group is the one sharing
+        the most LoRA files with the current one (ties keep first appearance).
+        """
+        if execution_order != "group by LoRA":
+            return list(indices)
+
+        def lora_names(signature):
+            return {tag[1:-1].split(":")[1] for tag in signature if len(tag[1:-1].split(":")) > 1}
+
+        groups = {}
+        for i in indices:
+            groups.setdefault(signatures[i], []).append(i)
+        remaining = list(groups)
+        current = () if () in groups else remaining[0] if remaining else ()
+        order = []
+        while remaining:
+            if current not in remaining:
+                current_names = lora_names(current)
+                current = max(remaining, key=lambda sig: len(lora_names(sig) & current_names))
+            remaining.remove(current)
+            order.extend(groups[current])
+        return order
+
+    def _dry_run_report(self, lora_loader, positive_prompts, negative_prompts, model, clip,
+                        strip_prompt_weights, first_pass_steps, upscale_steps, resume_scope_id,
+                        resume_keys, execution_order="index order"):
+        """
+        Per-item cost estimate, computed without loading or sampling anything:
+        LoRA bytes read from disk, cache hits (fused LoRA stacks, conditioning,
+        resume), model reloads caused by LoRA changes between items, and steps.
+
+        Mirrors what a real run does: the loader keeps the last LoRA file in
+        memory, and every item that loads LoRAs unloads the model afterwards,
+        so both a LoRA item and the item after it reload the model, unless
+        "group by LoRA" is on and the next item has the same LoRA tags, so it
+        reuses the patched model.
+        """
+        fused_enabled = is_lora_fused_stack_cache_enabled()
+        lines = [f"Dry run ({len(positive_prompts)} image(s), nothing sampled)"]
+        total_bytes = reloads = encodes = cached_encodes = total_steps = resumed = 0
+        loaded_path = None
+        previous_signature = ()
+        seen_keys = set()
+        reuse = execution_order == "group by LoRA"
+
+        pending = []
+        for i in range(len(positive_prompts)):
+            if i in resume_keys and has_item(resume_scope_id, resume_keys[i]):
+                resumed += 1
+                lines.append(f"  [{i}] resumed from an earlier run")
+            else:
+                pending.append(i)
+        signatures = [self._lora_signature(lora_loader, p) for p in positive_prompts]
+
+        for i in self._execution_order(pending, signatures, execution_order):
+            positive = positive_prompts[i]
+            signature = signatures[i]
+            reused = reuse and bool(signature) and signature == previous_signature
+            stack = lora_loader.resolve_lora_stack(positive) if signature and not reused else []
+            notes = ["reuses the previous image's LoRAs"] if reused else []
+
+            # LoRA files that have to be read from disk.
+            read_bytes = 0
+            fused_bytes = None
+            if len(stack) > 1 and fused_enabled and model is not None:
+                fused_bytes = fused_stack_read_bytes(stack_signature(model, clip, stack))
+            if fused_bytes is not None:
+                read_bytes = fused_bytes
+                notes.append("fused stack cache hit")
+            else:
+                for path, _, _ in stack:
+                    if path != loaded_path:
+                        try:
+                            read_bytes += os.path.getsize(path)
+                        except OSError:
+                            pass
+                    loaded_path = path
+            total_bytes += read_bytes
+            if stack:
+                names = ", ".join(os.path.basename(path) for path, _, _ in stack)
+                notes.append(f"LoRAs: {names} ({read_bytes / (1024 ** 2):.1f} MB to read)")
+            if not reused and len(stack) < len(signature):
+                notes.append(f"{len(signature) - len(stack)} LoRA tag(s) not found")
+
+            # Model reloads: patched clones are unloaded after their last item.
+            if (signature or previous_signature) and not reused:
+                reloads += 1
+                notes.append("model reload")
+            previous_signature = signature
+
+            # CLIP encodes that can't be served from the conditioning cache.
+            if clip is not None:
+                texts = self._clip_texts(
+                    re.sub(lora_loader.tag_pattern, "", positive), negative_prompts[i], strip_prompt_weights,
+                )
+                lora_key = self._lora_stack_key(lora_loader, positive) if signature else ()
+                item_encodes = 0
+                for text in texts:
+                    key = self._conditioning_cache_key(clip, lora_key, text)
+                    if key in seen_keys or key in _CONDITIONING_CACHE:
+                        cached_encodes += 1
+                    else:
+                        item_encodes += 1
+                        seen_keys.add(key)
+                encodes += item_encodes
+                notes.append(f"{item_encodes} encode(s)")
+
+            item_steps = first_pass_steps + upscale_steps
+            total_steps += item_steps
+            notes.append(f"{item_steps} steps")
+            lines.append(f"  [{i}] " + "; ".join(notes))
+
+        lines.append(
+            f"Total: {total_bytes / (1024 ** 2):.1f} MB of LoRA files to read, {reloads} model reload(s), "
+            f"{encodes} CLIP encode(s) ({cached_encodes} cached), {total_steps} sampling steps"
+            + (f", {resumed} image(s) resumed" if resumed else "")
+        )
+        return "\n".join(lines)
+
+    @staticmethod
+    def _lora_signature(lora_loader, prompt):
+        """The <lora:...> tags the LoRA loader applies for this prompt, in order."""
+        return tuple(
+            tag for tag in re.findall(lora_loader.tag_pattern, prompt)
+            if tag[1:-1].split(":")[0] == "lora"
+        )
+
+    @staticmethod
+    def _lora_stack_key(lora_loader, prompt):
+        """
+        The LoRA files a prompt's tags resolve to, as (path, size, mtime) plus
+        strengths, in order. Unlike the tag text, this changes when a LoRA file
+        is replaced or retrained under the same name, or a tag starts matching
+        a different file (same idea as the fused stack signature).
+        """
+        return tuple(
+            (file_signature(path), float(strength_model), float(strength_clip))
+            for path, strength_model, strength_clip in lora_loader.resolve_lora_stack(prompt)
+        )
+
     @staticmethod
-    def _encode(clip, prompt):
-        """Encode a single text prompt into a conditioning."""
-        tokens = clip.tokenize(prompt)
+    def _conditioning_cache_key(base_clip, lora_key, prompt):
+        """
+        Cache key for one encode. The base CLIP is identified by object id plus
+        its patch uuid (changed by any upstream LoRA loader) and clip-skip layer;
+        the LoRAs applied on top of it by their _lora_stack_key.
+        """
+        patcher = getattr(base_clip, "patcher", None)
+        return (
+            id(base_clip),
+            str(getattr(patcher, "patches_uuid", "")),
+            getattr(base_clip, "layer_idx", None),
+            lora_key,
+            prompt,
+        )
+
+    @staticmethod
+    def _encode(clip, prompt, base_clip=None, lora_key=(), tokens=None):
+        """
+        Encode a single text prompt into a conditioning.
+
+        When `base_clip` is given (the CLIP before this item's LoRAs were
+        applied), the result is looked up in and stored to the conditioning
+        cache. Entries keep a weakref to the base CLIP so a recycled object id
+        can never return another CLIP's encode. `tokens` skips tokenizing when
+        the prompt was already tokenized by the caller.
+        """
+        cache_key = None
+        if base_clip is not None:
+            cache_key = BatchWildcardSampler._conditioning_cache_key(base_clip, lora_key, prompt)
+            cached = _CONDITIONING_CACHE.get(cache_key)
+            if cached is not None:
+                clip_ref, cond_tensor, output = cached
+                if clip_ref() is base_clip:
+                    return [[cond_tensor, dict(output)]]
+                _CONDITIONING_CACHE.pop(cache_key)
+
+        if tokens is None:
+            tokens = clip.tokenize(prompt)
         output = clip.encode_from_tokens(tokens, return_pooled=True, return_dict=True)
         cond_tensor = output.pop("cond")
+
+        if cache_key is not None:
+            _CONDITIONING_CACHE.put(cache_key, (
+                weakref.ref(base_clip),
+                cond_tensor.cpu(),
+                {k: (v.cpu() if isinstance(v, torch.Tensor) else v) for k, v in output.items()},
+            ))
         return [[cond_tensor, output]]
 
 
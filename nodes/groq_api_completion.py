@@ -10,6 +10,7 @@ import base64
 from PIL import Image
 
 from ..utils.api_utils import load_prompt_options, get_prompt_content
+from ..utils.image_utils import tensor_to_uint8
 from ..utils.env_manager import ensure_env_file, get_api_key
 from ..utils.settings_utils import is_groq_completion_console_log_enabled, get_groq_completion_request_timeout
 
@@ -195,9 +196,7 @@ class GroqAPICompletion:
 
         # Ensure the tensor is in the form [H, W, C] (height, width, channels)
         if image_tensor.ndim == 3 and image_tensor.shape[2] == 3:  # Expecting RGB image with 3 channels
-            image_array = image_tensor.cpu().numpy()
-            image_array = (image_array * 255).astype(np.uint8)  # Convert from [0, 1] to [0, 255]
-            return Image.fromarray(image_array)
+            return Image.fromarray(tensor_to_uint8(image_tensor))  # Convert from [0, 1] to [0, 255]
         else:
             raise TypeError(f"Unsupported image tensor shape: {image_tensor.shape}")
 
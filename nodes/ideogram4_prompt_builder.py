@@ -16,6 +16,8 @@ import numpy as np
 import torch
 from PIL import Image, ImageDraw, ImageFont
 
+from ..utils.image_utils import tensor_to_uint8
+
 
 _FONT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fonts", "FreeMono.ttf")
 
@@ -315,7 +317,7 @@ class Ideogram4PromptBuilder:
         bg = None
         if image is not None:
             try:
-                bg = Image.fromarray((image[0].detach().cpu().numpy() * 255).clip(0, 255).astype(np.uint8))
+                bg = Image.fromarray(tensor_to_uint8(image[0]))
             except Exception:
                 bg = None
         preview = _render_preview(boxes, width, height, bg)
@@ -5,6 +5,8 @@ Original source code:
 https://github.com/KChronoKnight/Chrono-Save-for-Civitai
 """
 
+import functools
+import hashlib
 import json
 import os
 import re
@@ -13,7 +15,6 @@ from collections import deque
 from datetime import datetime
 
 import folder_paths
-import numpy as np
 from PIL import Image
 
 from ..utils.image_save_with_metadata_civitai import (
@@ -22,12 +23,18 @@ from ..utils.image_save_with_metadata_civitai import (
 )
 from ..utils.image_save_with_metadata_prompt_extractor import PromptMetadataExtractor
 from ..utils.image_save_with_metadata_saver import save_image
+from ..utils.filename_allocator import release_filename, reserve_filename
+from ..utils.image_save_writer import get_image_writer
+from ..utils.image_utils import tensor_to_uint8
+from ..utils.settings_utils import get_image_save_encode_workers
 from ..utils.image_save_with_metadata_utils import (
     full_checkpoint_path_for,
     full_lora_path_for,
 )
 from ..utils.image_save_runtime_capture import capture_runtime_prompt_and_loras
+from ..utils.model_hash_cache import get_autov2_hash, get_autov3_hash
 from ..utils.batch_wildcard_runtime import get_batch_prompts
+from ..utils.cache_utils import LRUCache
 from .wildcard_processor import WildcardProcessor
 
 SEED_FIELDS = ("seed", "noise_seed")
@@ -41,6 +48,7 @@ HEIGHT_FIELDS = ("height", "empty_latent_height")
 CKPT_NAME_FIELDS = ("ckpt_name", "unet_name")
 
 _WILDCARD_PROCESSOR = None
+_WORKFLOW_CACHE = LRUCache(max_items=16)
 _WILDCARD_PROCESSOR_LOCK = threading.Lock()
 
 
@@ -58,37 +66,81 @@ def _is_direct_value(v) -> bool:
     return not isinstance(v, list)
 
 
-def _first_direct(prompt: dict, field_names: tuple, default=None):
-    for _, node in prompt.items():
-        inputs = node.get("inputs", {})
-        for fname in field_names:
-            if fname in inputs and _is_direct_value(inputs[fname]):
-                return inputs[fname]
-    return default
-
-
-def _all_direct(prompt: dict, field_names: tuple) -> list:
-    results = []
-    for nid, node in prompt.items():
-        inputs = node.get("inputs", {})
-        for fname in field_names:
-            if fname in inputs and _is_direct_value(inputs[fname]):
-                results.append((nid, inputs[fname]))
-    return results
-
-
-def _find_checkpoint_name(prompt: dict) -> str:
-    for _, node in prompt.items():
-        inputs = node.get("inputs", {})
-        for fname in CKPT_NAME_FIELDS:
-            if fname in inputs and _is_direct_value(inputs[fname]):
-                val = str(inputs[fname])
-                if val and val.lower() != "none":
-                    return val
-    return ""
-
-
-def _find_lora_info(prompt: dict) -> list:
+class _WorkflowGraph:
+    """
+    Index over one API prompt, built in a single pass: node ids by class, the
+    literal values of every input name (in node order), and memoized text for
+    links and CLIP encoders. The metadata lookups below read from it instead
+    of each scanning the whole graph again.
+    """
+
+    def __init__(self, prompt: dict):
+        self.prompt = prompt
+        self.position = {}
+        self.by_class = {}
+        self.direct = {}
+        for pos, (nid, node) in enumerate(prompt.items()):
+            self.position[nid] = pos
+            self.by_class.setdefault(_node_class(node), []).append(nid)
+            for name, value in node.get("inputs", {}).items():
+                if _is_direct_value(value):
+                    self.direct.setdefault(name, []).append((nid, value))
+        self._link_text = {}
+        self._clip_text = {}
+
+    def nodes_of(self, class_types) -> list:
+        """(id, node) of every node of the given classes, in prompt order."""
+        ids = [nid for ct in class_types for nid in self.by_class.get(ct, ())]
+        ids.sort(key=self.position.__getitem__)
+        return [(nid, self.prompt[nid]) for nid in ids]
+
+    def first_direct(self, field_names: tuple, accept=None):
+        """First literal value of any of the fields, by node order then field order."""
+        best = None
+        for field_idx, fname in enumerate(field_names):
+            for nid, value in self.direct.get(fname, ()):
+                if accept is not None and not accept(value):
+                    continue
+                rank = (self.position[nid], field_idx)
+                if best is None or rank < best[0]:
+                    best = (rank, value)
+                break
+        return None if best is None else best[1]
+
+    def all_direct(self, field_names: tuple) -> list:
+        return [item for fname in field_names for item in self.direct.get(fname, ())]
+
+    def link_text(self, link, resolve) -> str:
+        """resolve(link, prompt) for a top-level link, computed once per link."""
+        if not isinstance(link, list) or not link:
+            return resolve(link, self.prompt)
+        key = (resolve, str(link[0]), link[1] if len(link) > 1 and isinstance(link[1], int) else 0)
+        if key not in self._link_text:
+            self._link_text[key] = resolve(link, self.prompt)
+        return self._link_text[key]
+
+    def clip_text(self, nid: str) -> str:
+        if nid not in self._clip_text:
+            self._clip_text[nid] = _extract_clip_text_from_node(self.prompt.get(nid, {}), self)
+        return self._clip_text[nid]
+
+
+def _first_direct(graph: _WorkflowGraph, field_names: tuple, default=None):
+    value = graph.first_direct(field_names)
+    return default if value is None else value
+
+
+def _all_direct(graph: _WorkflowGraph, field_names: tuple) -> list:
+    return graph.all_direct(field_names)
+
+
+def _find_checkpoint_name(graph: _WorkflowGraph) -> str:
+    val = graph.first_direct(CKPT_NAME_FIELDS, accept=lambda v: str(v) and str(v).lower() != "none")
+    return str(val) if val is not None else ""
+
+
+def _find_lora_info(graph: _WorkflowGraph) -> list:
+    prompt = graph.prompt
     loras = []
     seen_names = set()
 
@@ -128,7 +180,7 @@ def _find_lora_info(prompt: dict) -> list:
         if "lora loader prompt tags" in ct.lower() or ct == "LoraTagLoader":
             raw = inputs.get("STRING", "")
             if isinstance(raw, list):
-                raw = _resolve_link_text(raw, prompt)
+                raw = graph.link_text(raw, _resolve_link_text)
             if isinstance(raw, str) and raw:
                 for m in re.findall(r"<lora:([^>:]+)(?::([^>:]+))?(?::([^>:]+))?>", raw, flags=re.IGNORECASE):
                     name = (m[0] or "").strip()
@@ -331,20 +383,21 @@ def _resolve_text_from_link(link, prompt: dict, depth=0, visited=None) -> str:
     return _resolve_link_text(link, prompt, depth, visited)
 
 
-def _extract_clip_text_from_node(node: dict, prompt: dict) -> str:
+def _extract_clip_text_from_node(node: dict, graph: _WorkflowGraph) -> str:
     inputs = node.get("inputs", {})
     for key in ("text", "text_g", "t5xxl", "prompt"):
         val = inputs.get(key)
         if isinstance(val, str) and val.strip():
             return val
         if isinstance(val, list):
-            resolved = _resolve_text_from_link(val, prompt)
+            resolved = graph.link_text(val, _resolve_text_from_link)
             if resolved:
                 return resolved
     return ""
 
 
-def _find_conditioning_text(start_link, prompt: dict, expected: str) -> str:
+def _find_conditioning_text(start_link, graph: _WorkflowGraph, expected: str) -> str:
+    prompt = graph.prompt
     if not isinstance(start_link, list) or len(start_link) < 1:
         return ""
     start_node_id = str(start_link[0])
@@ -360,7 +413,7 @@ def _find_conditioning_text(start_link, prompt: dict, expected: str) -> str:
         node = prompt.get(nid, {})
         class_type = node.get("class_type", "")
         if class_type in CLIP_ENCODER_TYPES:
-            return _extract_clip_text_from_node(node, prompt)
+            return graph.clip_text(nid)
         if class_type == "PromptPropertyExtractor":
             input_string = node.get("inputs", {}).get("input_string", "")
             if expected == "negative":
@@ -389,51 +442,42 @@ def _strip_lora_tags(text: str) -> str:
     return re.sub(r"\s+", " ", cleaned).strip()
 
 
-def _find_positive_from_lora_tag_loader(prompt: dict) -> str:
-    for _, node in prompt.items():
-        ct = str(node.get("class_type", "")).lower()
-        if "lora loader prompt tags" in ct or ct == "loratagloader":
-            src = node.get("inputs", {}).get("STRING", "")
-            if isinstance(src, list):
-                src = _resolve_link_text(src, prompt)
-            if isinstance(src, str) and src.strip():
-                return _strip_lora_tags(src)
+def _find_positive_from_lora_tag_loader(graph: _WorkflowGraph) -> str:
+    loader_classes = [ct for ct in graph.by_class if "lora loader prompt tags" in ct.lower() or ct.lower() == "loratagloader"]
+    for _, node in graph.nodes_of(loader_classes):
+        src = node.get("inputs", {}).get("STRING", "")
+        if isinstance(src, list):
+            src = graph.link_text(src, _resolve_link_text)
+        if isinstance(src, str) and src.strip():
+            return _strip_lora_tags(src)
     return ""
 
 
-def _find_prompts(prompt: dict) -> tuple:
+def _find_prompts(graph: _WorkflowGraph) -> tuple:
     positive = ""
     negative = ""
 
-    for _, node in prompt.items():
-        class_type = node.get("class_type", "")
+    for _, node in graph.nodes_of(SAMPLER_FIELDS_MAP):
         inputs = node.get("inputs", {})
-        sampler_map = SAMPLER_FIELDS_MAP.get(class_type)
-        if not sampler_map:
-            continue
+        sampler_map = SAMPLER_FIELDS_MAP[_node_class(node)]
 
         if not positive:
             pos_field = sampler_map.get("positive")
             pos_ref = inputs.get(pos_field) if pos_field else None
             if isinstance(pos_ref, list) and len(pos_ref) >= 1:
-                positive = _find_conditioning_text(pos_ref, prompt, "positive")
+                positive = _find_conditioning_text(pos_ref, graph, "positive")
 
         if not negative:
             neg_field = sampler_map.get("negative")
             neg_ref = inputs.get(neg_field) if neg_field else None
             if isinstance(neg_ref, list) and len(neg_ref) >= 1:
-                negative = _find_conditioning_text(neg_ref, prompt, "negative")
+                negative = _find_conditioning_text(neg_ref, graph, "negative")
 
         if positive and negative:
             break
 
     if not positive or not negative:
-        all_texts = []
-        for _, node in prompt.items():
-            if node.get("class_type", "") in CLIP_ENCODER_TYPES:
-                t = _extract_clip_text_from_node(node, prompt)
-                if t:
-                    all_texts.append(t)
+        all_texts = [t for t in (graph.clip_text(nid) for nid, _ in graph.nodes_of(CLIP_ENCODER_TYPES)) if t]
         dedup_texts = list(dict.fromkeys(all_texts))
         all_texts = dedup_texts
         neg_candidates = [t for t in all_texts if _looks_negative(t)]
@@ -444,12 +488,7 @@ def _find_prompts(prompt: dict) -> tuple:
             negative = (neg_candidates[0] if neg_candidates else (all_texts[1] if len(all_texts) > 1 else ""))
 
     if positive and negative and positive == negative:
-        all_texts = []
-        for _, node in prompt.items():
-            if node.get("class_type", "") in CLIP_ENCODER_TYPES:
-                t = _extract_clip_text_from_node(node, prompt)
-                if t:
-                    all_texts.append(t)
+        all_texts = [t for t in (graph.clip_text(nid) for nid, _ in graph.nodes_of(CLIP_ENCODER_TYPES)) if t]
         neg_candidates = [t for t in all_texts if _looks_negative(t) and t != positive]
         pos_candidates = [t for t in all_texts if (not _looks_negative(t)) and t != negative]
         if neg_candidates:
@@ -459,8 +498,8 @@ def _find_prompts(prompt: dict) -> tuple:
 
     # Systematic fallback for workflows where positive text is assembled upstream and fed
     # through LoRA Loader Prompt Tags before CLIPTextEncode.
-    if (not positive or positive == negative) and prompt:
-        lora_loader_positive = _find_positive_from_lora_tag_loader(prompt)
+    if (not positive or positive == negative) and graph.prompt:
+        lora_loader_positive = _find_positive_from_lora_tag_loader(graph)
         if lora_loader_positive:
             positive = lora_loader_positive
 
@@ -484,25 +523,52 @@ def _extract_from_workflow(prompt: dict) -> dict:
             "denoise": 1.0,
         }
 
-    positive, negative = _find_prompts(prompt)
-    all_widths = _all_direct(prompt, WIDTH_FIELDS)
-    all_heights = _all_direct(prompt, HEIGHT_FIELDS)
+    # Repeated runs of the same graph (queue repeats, batches) reuse the analysis.
+    # Graphs that resolve wildcards are analysed every time: their prompt text
+    # depends on the wildcard files, which can change while the graph doesn't.
+    if _uses_wildcard_files(prompt):
+        return _analyze_workflow(_WorkflowGraph(prompt))
+    key = hashlib.sha1(json.dumps(prompt, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    cached = _WORKFLOW_CACHE.get(key)
+    if cached is None:
+        cached = _analyze_workflow(_WorkflowGraph(prompt))
+        _WORKFLOW_CACHE.put(key, cached)
+    return {**cached, "loras": list(cached["loras"])}
+
+
+def _uses_wildcard_files(prompt: dict) -> bool:
+    """Whether any node of the API prompt resolves wildcards from files."""
+    for node in prompt.values():
+        if not isinstance(node, dict):
+            continue
+        class_type = str(node.get("class_type", ""))
+        if class_type == "WildcardProcessor" or "wildcard processor" in class_type.lower():
+            return True
+        if "recache_wildcards" in node.get("inputs", {}):
+            return True
+    return False
+
+
+def _analyze_workflow(graph: _WorkflowGraph) -> dict:
+    positive, negative = _find_prompts(graph)
+    all_widths = _all_direct(graph, WIDTH_FIELDS)
+    all_heights = _all_direct(graph, HEIGHT_FIELDS)
     width = max((v for _, v in all_widths), default=512) if all_widths else 512
     height = max((v for _, v in all_heights), default=512) if all_heights else 512
 
     return {
         "positive": positive,
         "negative": negative,
-        "modelname": _find_checkpoint_name(prompt),
-        "loras": _find_lora_info(prompt),
-        "seed": _first_direct(prompt, SEED_FIELDS, 0),
-        "steps": _first_direct(prompt, STEPS_FIELDS, 20),
-        "cfg": _first_direct(prompt, CFG_FIELDS, 7.0),
-        "sampler_name": _first_direct(prompt, SAMPLER_FIELDS, ""),
-        "scheduler_name": _first_direct(prompt, SCHEDULER_FIELDS, "normal"),
+        "modelname": _find_checkpoint_name(graph),
+        "loras": _find_lora_info(graph),
+        "seed": _first_direct(graph, SEED_FIELDS, 0),
+        "steps": _first_direct(graph, STEPS_FIELDS, 20),
+        "cfg": _first_direct(graph, CFG_FIELDS, 7.0),
+        "sampler_name": _first_direct(graph, SAMPLER_FIELDS, ""),
+        "scheduler_name": _first_direct(graph, SCHEDULER_FIELDS, "normal"),
         "width": int(width),
         "height": int(height),
-        "denoise": _first_direct(prompt, DENOISE_FIELDS, 1.0),
+        "denoise": _first_direct(graph, DENOISE_FIELDS, 1.0),
     }
 
 
@@ -549,16 +615,44 @@ def _parse_ckpt_basename(ckpt_name: str) -> str:
 
 
 def _get_unique_filename(output_path: str, prefix: str, extension: str) -> str:
-    existing = [f for f in os.listdir(output_path) if f.startswith(prefix) and f.endswith(extension)]
-    if not existing:
-        return prefix
-    suffixes = []
-    for f in existing:
-        name, _ = os.path.splitext(f)
-        parts = name.split("_")
-        if parts[-1].isdigit():
-            suffixes.append(int(parts[-1]))
-    return f"{prefix}_{(max(suffixes) + 1) if suffixes else 1:04d}"
+    """
+    Reserve the next free name: the bare prefix while no file starts with it,
+    then prefix_0001, prefix_0002, ... after the highest numeric suffix.
+    """
+    def format_name(counter):
+        return f"{prefix}.{extension}" if counter == 0 else f"{prefix}_{counter:04d}.{extension}"
+
+    def parse_counter(filename):
+        if not (filename.startswith(prefix) and filename.endswith(extension)):
+            return None
+        last = os.path.splitext(filename)[0].split("_")[-1]
+        return int(last) if last.isdigit() else 0
+
+    filename, _ = reserve_filename(output_path, ("image", prefix, extension), format_name, parse_counter, start=0)
+    return os.path.splitext(filename)[0]
+
+
+def _write_image(pixels, output_path, filename, ext, quality, a111_params, prompt, extra_pnginfo, embed_workflow, compress_level=6, compress_workflow=False):
+    """Encode a uint8 HxWxC buffer and write it to its reserved file."""
+    try:
+        save_image(
+            Image.fromarray(pixels),
+            os.path.join(output_path, filename),
+            ext,
+            quality,
+            lossless_webp=True,
+            # Pillow ignores compress_level and always uses level 9 when optimize is on.
+            optimize_png=False,
+            a111_params=a111_params,
+            prompt=prompt,
+            extra_pnginfo=extra_pnginfo,
+            embed_workflow=embed_workflow,
+            compress_level=compress_level,
+            compress_workflow=compress_workflow,
+        )
+    except Exception:
+        release_filename(output_path, filename)
+        raise
 
 
 def _clean_prompt(prompt_text: str, extractor: PromptMetadataExtractor) -> str:
@@ -590,12 +684,25 @@ def _build_a111_params(positive: str, negative: str, ctx: dict) -> str:
     models_used = [ctx["basemodelname"]] + direct_lora_names + all_lora_names
     models_used_str = "\n".join(dict.fromkeys([m for m in models_used if m]))
 
+    # Hashes still being computed in the background are left out of this image.
+    model_hash = get_autov2_hash(ctx["ckpt_path"])
+    model_hash_str = f", Model hash: {model_hash}" if model_hash else ""
+    lora_hashes = []
+    for name in dict.fromkeys(n for n in direct_lora_names + all_lora_names if n):
+        if name not in ctx["lora_paths"]:
+            ctx["lora_paths"][name] = full_lora_path_for(name)
+        lora_hash = get_autov3_hash(ctx["lora_paths"][name])
+        if lora_hash:
+            lora_hashes.append(f"{name}: {lora_hash}")
+    lora_hashes_str = f', Lora hashes: "{", ".join(lora_hashes)}"' if lora_hashes else ""
+
     return (
         f"{pos_text}\n"
         f"Negative prompt: {neg_text}\n"
         f"Steps: {ctx['steps']}, Sampler: {ctx['display_sampler']}, CFG scale: {ctx['cfg']}, "
         f"Seed: {ctx['seed']}, Size: {ctx['width']}x{ctx['height']}"
-        f", Model: {ctx['basemodelname']}, Models used: {models_used_str}, Version: ComfyUI"
+        f"{model_hash_str}, Model: {ctx['basemodelname']}, Models used: {models_used_str}"
+        f"{lora_hashes_str}, Version: ComfyUI"
     )
 
 
@@ -674,6 +781,9 @@ class ImageSaveWithMetadata:
                 "quality": ("INT", {"default": 100, "min": 1, "max": 100}),
                 "embed_workflow": ("BOOLEAN", {"default": True, "tooltip": "Include workflow in the image."}),
                 "strip_lora_prompt": ("BOOLEAN", {"default": False, "tooltip": "Strip LoRAs from prompt."}),
+                "background_save": ("BOOLEAN", {"default": False, "tooltip": "Encode and write the files on a background thread so the queue doesn't wait for disk. The preview may show before the file is written; write errors are reported by the next save."}),
+                "png_compression": ("INT", {"default": 6, "min": 0, "max": 9, "tooltip": "PNG compression level (zlib). 0 stores the pixels uncompressed (fastest, largest files), 9 is slowest with the smallest files. Images stay lossless at every level."}),
+                "compress_workflow": ("BOOLEAN", {"default": False, "tooltip": "Store the embedded workflow compressed: compressed iTXt chunks in PNG, zlib+base64 in JPEG/WebP EXIF. Keeps large workflows in JPEGs and shrinks PNGs. The metadata extractor nodes read it; other tools may not."}),
             },
             "optional": {
                 "positive_override": ("STRING", {"default": "", "multiline": True, "forceInput": True, "tooltip": "Override the auto-detected positive prompt. Accepts a single string (applied to every image) or a list of prompts (one per image, looping if the count differs from the number of images)."}),
@@ -693,10 +803,17 @@ class ImageSaveWithMetadata:
         quality=100,
         embed_workflow=True,
         strip_lora_prompt=False,
+        background_save=False,
+        png_compression=6,
+        compress_workflow=False,
         positive_override="",
         prompt=None,
         extra_pnginfo=None,
     ):
+        writer = get_image_writer(get_image_save_encode_workers())
+        for error in writer.take_errors():
+            print(f"ImageSaveWithMetadata Warning: A background save failed: {error}")
+
         # positive_override may be a single string or a list of per-image prompts
         # (e.g. wired from the Batch Wildcard Sampler's resolved_prompts list output).
         override_list = None
@@ -756,6 +873,7 @@ class ImageSaveWithMetadata:
             "wf": wf,
             "modelname": modelname,
             "ckpt_path": ckpt_path,
+            "lora_paths": {},
             "runtime_loras": runtime_loras,
             "strip_lora_prompt": strip_lora_prompt,
             "steps": steps,
@@ -798,9 +916,10 @@ class ImageSaveWithMetadata:
 
         ext = "jpg" if file_format == "jpeg" else file_format
         results = []
-        for idx, image in enumerate(images):
-            i = 255.0 * image.cpu().numpy()
-            img = Image.fromarray(np.clip(i, 0, 255).astype(np.uint8))
+        pending = []
+        # Whole batch converted once on its device; each pixels is a view into it.
+        batch_pixels = tensor_to_uint8(images)
+        for idx, pixels in enumerate(batch_pixels):
             unique_name = _get_unique_filename(full_output_path, resolved_prefix, ext)
             final_filename = f"{unique_name}.{ext}"
             filepath = os.path.join(full_output_path, final_filename)
@@ -810,26 +929,36 @@ class ImageSaveWithMetadata:
             # the decoded image is larger than the first-pass width/height stored in
             # the workflow; using stale workflow dimensions causes tools like Civitai
             # to reject the entire metadata block (including the prompt).
-            actual_w, actual_h = img.size  # PIL gives (width, height)
+            actual_h, actual_w = pixels.shape[:2]
             img_ctx = ctx if (actual_w == ctx["width"] and actual_h == ctx["height"]) else {**ctx, "width": actual_w, "height": actual_h}
             image_params = _build_a111_params(positive_for(idx), negative_for(idx), {**img_ctx, "seed": seed_for(idx)})
 
-            save_image(
-                img,
-                filepath,
+            write = functools.partial(
+                _write_image,
+                pixels,
+                full_output_path,
+                final_filename,
                 ext,
                 quality,
-                True,
-                False,
                 image_params,
                 prompt if embed_workflow else None,
                 extra_pnginfo if embed_workflow else None,
                 embed_workflow,
+                png_compression,
+                compress_workflow,
             )
+            if background_save:
+                writer.submit(write, filepath, report=True)
+            else:
+                pending.append(writer.submit(write, filepath))
 
             subfolder = os.path.normpath(resolved_folder) if resolved_folder else ""
             results.append({"filename": final_filename, "subfolder": subfolder if subfolder != "." else "", "type": "output"})
 
+        # Images are encoded in parallel; a normal save still waits for its files.
+        for future in pending:
+            future.result()
+
         return {"ui": {"images": results}}
 
 
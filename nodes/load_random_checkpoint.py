@@ -1,14 +1,19 @@
 import os
 import random
 import folder_paths
-import comfy.sd
 import difflib
 import hashlib
 import colorama
 
-from ..utils.settings_utils import is_load_random_checkpoint_console_log_enabled
+from ..utils.cache_utils import LRUCache
+from ..utils.checkpoint_catalog import directory_files, get_name_index
+from ..utils.model_load_cache import ModelCacheLease, load_checkpoint as load_checkpoint_cached
+from ..utils.settings_utils import get_model_cache_memory_gb, is_load_random_checkpoint_console_log_enabled
 
-POOL_CACHE = {}
+# Resolved pools keyed by the inputs and the checkpoint files they resolve
+# against. Rebuilding a pool is cheap now that the checkpoint catalog and name
+# index are cached, so only recent inputs are kept.
+POOL_CACHE = LRUCache(max_items=32)
 
 class LoadRandomCheckpoint:
     def __init__(self):
@@ -16,6 +21,7 @@ class LoadRandomCheckpoint:
         self.cached_index = -1
         self.last_input_hash = ""
         self.shuffled_pool = []
+        self.model_lease = ModelCacheLease()
 
     @classmethod
     def INPUT_TYPES(cls):
@@ -47,6 +53,11 @@ class LoadRandomCheckpoint:
     DESCRIPTION = "Load checkpoints from a flexible list with repeat control. Supports fuzzy name matching, file paths, and directories. Perfect for batch processing with varied model selection."
 
 
+    @staticmethod
+    def _line_path(line, ckpt_base_dirs):
+        """The path a pool line refers to: absolute, or under the first checkpoints folder."""
+        return os.path.abspath(os.path.join(ckpt_base_dirs[0], line)) if not os.path.isabs(line) else line
+
     def find_best_matches_custom(self, query, candidates, console_log=False):
         if console_log:
             print(f"Finding best matches for '{query}'...")
@@ -54,11 +65,8 @@ class LoadRandomCheckpoint:
             return []
 
         query_norm = query.lower()
-        contains_matches = []
-        for candidate in candidates:
-            candidate_lower = os.path.basename(candidate).lower()
-            if query_norm in candidate_lower:
-                contains_matches.append(candidate)
+        index = get_name_index(candidates)
+        contains_matches = index.substring_matches(query_norm)
 
         if contains_matches:
             if console_log:
@@ -67,22 +75,35 @@ class LoadRandomCheckpoint:
                     print(f"  - {os.path.basename(match)}")
             return contains_matches
 
-        # If no substring matches, fall back to fuzzy matching
-        scores = []
-        for candidate in candidates:
-            candidate_filename = os.path.basename(candidate)
-            candidate_norm, _ = os.path.splitext(candidate_filename)
-            candidate_norm = candidate_norm.lower()
-
-            ratio = difflib.SequenceMatcher(None, query_norm, candidate_norm).ratio()
-
+        # If no substring matches, fall back to fuzzy matching. The candidates
+        # sharing the most trigrams with the query are scored first. Every other
+        # candidate is only scored when SequenceMatcher's cheap upper bounds
+        # (real_quick_ratio, quick_ratio) say it could still reach the best
+        # score so far, so the result is the same as scoring every candidate.
+        def score(matcher, candidate_norm, best=None):
+            """The candidate's score, or None once an upper bound falls below `best`."""
             if query_norm == candidate_norm:
-                ratio = 1.0
-            elif query_norm in candidate_norm:
-                ratio += 0.1
-
-            scores.append((candidate, ratio))
-
+                return 1.0
+            bonus = 0.1 if query_norm in candidate_norm else 0.0
+            if best is not None and (matcher.real_quick_ratio() + bonus < best
+                                     or matcher.quick_ratio() + bonus < best):
+                return None
+            return matcher.ratio() + bonus
+
+        scored = {}
+        for i in index.shortlist(query_norm):
+            scored[i] = score(difflib.SequenceMatcher(None, query_norm, index.stems[i]), index.stems[i])
+        best = max(scored.values(), default=0.0)
+        for i, candidate_norm in enumerate(index.stems):
+            if i in scored:
+                continue
+            ratio = score(difflib.SequenceMatcher(None, query_norm, candidate_norm), candidate_norm, best)
+            if ratio is not None:
+                scored[i] = ratio
+                best = max(best, ratio)
+
+        # Same order as a full scan: candidate order, then stably by score.
+        scores = [(index.names[i], scored[i]) for i in sorted(scored)]
         scores.sort(key=lambda x: x[1], reverse=True)
 
         if console_log:
@@ -119,13 +140,27 @@ class LoadRandomCheckpoint:
         else:
             if console_log:
                 print("Status > CACHE MISS: Selecting a new checkpoint.")
-            input_hash = hashlib.sha256(checkpoints.encode() + limit_to_paths.encode()).hexdigest()
-            if input_hash not in POOL_CACHE:
+            ckpt_base_dirs = folder_paths.get_folder_paths("checkpoints")
+            all_checkpoints_relative = folder_paths.get_filename_list("checkpoints")
+
+            # The pool also depends on the files on disk: the checkpoint list
+            # that names are matched against and the contents of every listed
+            # directory. Both are cached and only rescanned when folders change,
+            # so a pool is rebuilt as soon as a checkpoint is added or removed.
+            digest = hashlib.sha256()
+            for part in [checkpoints, limit_to_paths, *all_checkpoints_relative]:
+                digest.update(part.encode() + b"\0")
+            for line in checkpoints.splitlines():
+                path_to_check = self._line_path(line.strip(), ckpt_base_dirs) if line.strip() else None
+                if path_to_check and os.path.isdir(path_to_check):
+                    for path in directory_files(path_to_check):
+                        digest.update(path.encode() + b"\0")
+            input_hash = digest.hexdigest()
+            cached_pool = POOL_CACHE.get(input_hash)
+            if cached_pool is None:
                 if console_log:
-                    print("Pool > Input changed, rebuilding checkpoint pool...")
+                    print("Pool > Input or checkpoint files changed, rebuilding checkpoint pool...")
                 final_pool = []
-                ckpt_base_dirs = folder_paths.get_folder_paths("checkpoints")
-                all_checkpoints_relative = folder_paths.get_filename_list("checkpoints")
 
                 search_candidates = all_checkpoints_relative
                 user_paths = [p.strip().replace('\\', '/') for p in limit_to_paths.splitlines() if p.strip()]
@@ -140,13 +175,10 @@ class LoadRandomCheckpoint:
                     line = line.strip()
                     if not line: continue
 
-                    path_to_check = os.path.abspath(os.path.join(ckpt_base_dirs[0], line)) if not os.path.isabs(line) else line
+                    path_to_check = self._line_path(line, ckpt_base_dirs)
 
                     if os.path.isdir(path_to_check):
-                        for root, _, files in os.walk(path_to_check, followlinks=True):
-                            for file in files:
-                                if file.endswith(('.ckpt', '.safetensors')):
-                                    final_pool.append(os.path.join(root, file))
+                        final_pool.extend(directory_files(path_to_check, console_log=console_log))
                     elif os.path.isabs(line) and os.path.exists(line):
                         final_pool.append(line)
                     else:
@@ -158,11 +190,11 @@ class LoadRandomCheckpoint:
                 # Use effective_index=0 for initial pool shuffling to ensure consistency
                 rng = random.Random(0)
                 rng.shuffle(self.shuffled_pool)
-                POOL_CACHE[input_hash] = self.shuffled_pool
+                POOL_CACHE.put(input_hash, self.shuffled_pool)
                 if console_log:
                     print(f"Pool > Rebuilt pool with {len(self.shuffled_pool)} unique items.")
             else:
-                self.shuffled_pool = POOL_CACHE[input_hash]
+                self.shuffled_pool = cached_pool
                 if console_log:
                     print(f"Pool > Using cached pool with {len(self.shuffled_pool)} items.")
 
@@ -202,12 +234,11 @@ class LoadRandomCheckpoint:
         if console_log:
             print(f"Loading checkpoint...")
 
-        model, clip, vae, _ = comfy.sd.load_checkpoint_guess_config(
-            path,
-            output_vae=True,
-            output_clip=True,
-            embedding_directory=folder_paths.get_folder_paths("embeddings")
-        )
+        # Repeats and short pools reuse the already-loaded checkpoint.
+        with self.model_lease:
+            model, clip, vae = load_checkpoint_cached(
+                path, get_model_cache_memory_gb(), console_log=console_log, lease=self.model_lease,
+            )
 
         if console_log:
             print(FOOTER)
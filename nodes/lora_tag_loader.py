@@ -2,7 +2,14 @@ from pathlib import Path
 import folder_paths
 import re
 from ..utils.file_utils import find_best_match
-from ..utils.settings_utils import is_lora_console_log_enabled, is_lora_fuzzy_search_enabled, get_lora_max_logged_candidates
+from ..utils.settings_utils import is_lora_console_log_enabled, is_lora_fuzzy_search_enabled, get_lora_max_logged_candidates, is_lora_fused_stack_cache_enabled
+from ..utils.lora_stack_cache import (
+    apply_fused_stack,
+    build_fused_stack,
+    load_fused_stack,
+    save_fused_stack,
+    stack_signature,
+)
 
 # Import ComfyUI files
 import comfy.sd
@@ -80,19 +87,14 @@ class LoraTagLoader:
     DESCRIPTION = "Loads LoRA tags from the provided input string (usually the prompt) and applies them to the model without needing one or multiple LoRA Loader nodes"
 
 
-    def load_lora(self, MODEL, CLIP, STRING):
-        console_log = is_lora_console_log_enabled()
-        if console_log:
-            print(f"\nLoraTagLoader processing text: {STRING}")
-
+    def resolve_lora_stack(self, STRING, console_log=False):
+        """
+        Match the <lora:...> tags in STRING to LoRA files.
+        Returns a list of (lora_path, model_strength, clip_strength) in tag order.
+        """
         founds = re.findall(self.tag_pattern, STRING)
-        if len(founds) < 1:
-            return (MODEL, CLIP, STRING)
-
-        model_lora = MODEL
-        clip_lora = CLIP
-        
         lora_files = folder_paths.get_filename_list("loras")
+        stack = []
         for f in founds:
             tag = f[1:-1]
             pak = tag.split(":")
@@ -140,68 +142,138 @@ class LoraTagLoader:
             if console_log:
                 print(f"\nApplying LoRA: {(type, name, wModel, wClip)} >> {lora_name}")
             
-            # Load and apply the LoRA
-            lora_path = folder_paths.get_full_path("loras", lora_name)
-            lora = None
-            
-            # Check if we already have this LoRA loaded
-            if self.loaded_lora is not None:
-                if self.loaded_lora[0] == lora_path:
-                    lora = self.loaded_lora[1]
-                else:
-                    temp = self.loaded_lora
-                    self.loaded_lora = None
-                    del temp
-
-            # Load the LoRA if needed
-            if lora is None:
-                lora = comfy.utils.load_torch_file(lora_path, safe_load=True)
-                self.loaded_lora = (lora_path, lora)
-
-            # Apply the LoRA
-            is_zit = False
-            if hasattr(comfy.model_base, "Lumina2"):
-                if isinstance(model_lora.model, comfy.model_base.Lumina2):
-                    is_zit = True
-
-            if is_zit:
+            stack.append((folder_paths.get_full_path("loras", lora_name), wModel, wClip))
+
+        return stack
+
+    def prepare_lora_stack(self, STRING, MODEL=None, CLIP=None, console_log=False):
+        """
+        Resolve the stack for STRING and read its LoRA files without touching
+        any model, so it is safe to run on a worker thread ahead of load_lora.
+        Pass the result as load_lora(..., prepared=...) to skip the matching
+        and disk reads. When MODEL/CLIP are given and the stack is already in
+        the fused stack cache, that entry is warmed instead of the LoRA files.
+        A file that is already held as the last loaded LoRA is not read again.
+        """
+        stack = self.resolve_lora_stack(STRING, console_log)
+        if MODEL is not None and len(stack) > 1 and is_lora_fused_stack_cache_enabled():
+            if load_fused_stack(stack_signature(MODEL, CLIP, stack)) is not None:
+                return stack, {}
+        loaded = self.loaded_lora
+        state_dicts = {}
+        for lora_path, _, _ in stack:
+            if lora_path not in state_dicts and (loaded is None or loaded[0] != lora_path):
+                state_dicts[lora_path] = comfy.utils.load_torch_file(lora_path, safe_load=True)
+        return stack, state_dicts
+
+    def load_lora(self, MODEL, CLIP, STRING, prepared=None):
+        console_log = is_lora_console_log_enabled()
+        if console_log:
+            print(f"\nLoraTagLoader processing text: {STRING}")
+
+        founds = re.findall(self.tag_pattern, STRING)
+        if len(founds) < 1:
+            return (MODEL, CLIP, STRING)
+
+        model_lora = MODEL
+        clip_lora = CLIP
+
+        if prepared is not None:
+            stack, state_dicts = prepared
+        else:
+            stack, state_dicts = self.resolve_lora_stack(STRING, console_log), {}
+
+        # A stack of several LoRAs can be applied from the fused stack cache as
+        # a single patch per weight, instead of loading and patching each LoRA.
+        use_fused = len(stack) > 1 and is_lora_fused_stack_cache_enabled()
+        signature = None
+        if use_fused:
+            signature = stack_signature(MODEL, CLIP, stack)
+            fused = load_fused_stack(signature)
+            if fused is not None:
                 if console_log:
-                    print(f"LoraTagLoader: ZiT model detected, applying custom key mapping via monkeypatch.")
-                # Monkeypatch approach: temporarily modify model_lora_keys_unet to include ZiT support
-                # This replicates the logic from the ComfyUI commit
-                original_model_lora_keys_unet = comfy.lora.model_lora_keys_unet
-                
-                def patched_model_lora_keys_unet(model, key_map={}):
-                    # Call the original function first
-                    key_map = original_model_lora_keys_unet(model, key_map)
-                    
-                    # Add ZiT-specific mappings if it's a Lumina2 model
-                    if isinstance(model, comfy.model_base.Lumina2):
-                        diffusers_keys = z_image_to_diffusers(model.model_config.unet_config, output_prefix="diffusion_model.")
-                        for k in diffusers_keys:
-                            to = diffusers_keys[k]
-                            key_lora = k[:-len(".weight")]
-                            key_map["diffusion_model.{}".format(key_lora)] = to
-                            key_map["lycoris_{}".format(key_lora.replace(".", "_"))] = to
-                    
-                    return key_map
-                
-                # Temporarily replace the function
-                comfy.lora.model_lora_keys_unet = patched_model_lora_keys_unet
-                
-                try:
-                    # Use the standard loading path, which will now use our patched function
-                    model_lora, clip_lora = comfy.sd.load_lora_for_models(model_lora, clip_lora, lora, wModel, wClip)
-                finally:
-                    # Always restore the original function
-                    comfy.lora.model_lora_keys_unet = original_model_lora_keys_unet
-            else:
-                model_lora, clip_lora = comfy.sd.load_lora_for_models(model_lora, clip_lora, lora, wModel, wClip)
+                    print(f"LoraTagLoader: Applying {len(stack)} LoRAs from the fused stack cache.")
+                model_lora, clip_lora = apply_fused_stack(MODEL, CLIP, fused)
+                plain_prompt = re.sub(self.tag_pattern, "", STRING)
+                return (model_lora, clip_lora, plain_prompt)
+
+        for lora_path, wModel, wClip in stack:
+            lora = self._load_lora_file(lora_path, state_dicts)
+            model_lora, clip_lora = self._apply_lora(model_lora, clip_lora, lora, wModel, wClip, console_log)
+
+        if use_fused:
+            fused = build_fused_stack(MODEL, CLIP, model_lora, clip_lora)
+            if fused is not None:
+                if console_log:
+                    print(f"LoraTagLoader: Saving {len(stack)} LoRAs to the fused stack cache.")
+                save_fused_stack(signature, fused, stack)
+            elif console_log:
+                print("LoraTagLoader: Stack contains weights other than plain LoRA (DoRA, LoHa, LoKr, OFT, ...), "
+                      "which can't be fused. Using the normal LoRA path.")
 
         # Remove the LoRA tags from the text
         plain_prompt = re.sub(self.tag_pattern, "", STRING)
         return (model_lora, clip_lora, plain_prompt)
 
+    def _load_lora_file(self, lora_path, state_dicts=None):
+        """Load a LoRA state dict, reusing a prefetched or the last loaded one."""
+        if state_dicts and lora_path in state_dicts:
+            self.loaded_lora = (lora_path, state_dicts[lora_path])
+            return self.loaded_lora[1]
+
+        # Check if we already have this LoRA loaded
+        if self.loaded_lora is not None:
+            if self.loaded_lora[0] == lora_path:
+                return self.loaded_lora[1]
+            temp = self.loaded_lora
+            self.loaded_lora = None
+            del temp
+
+        lora = comfy.utils.load_torch_file(lora_path, safe_load=True)
+        self.loaded_lora = (lora_path, lora)
+        return lora
+
+    def _apply_lora(self, model_lora, clip_lora, lora, wModel, wClip, console_log=False):
+        """Apply one loaded LoRA to the model and clip."""
+        is_zit = False
+        if hasattr(comfy.model_base, "Lumina2"):
+            if isinstance(model_lora.model, comfy.model_base.Lumina2):
+                is_zit = True
+
+        if not is_zit:
+            return comfy.sd.load_lora_for_models(model_lora, clip_lora, lora, wModel, wClip)
+
+        if console_log:
+            print(f"LoraTagLoader: ZiT model detected, applying custom key mapping via monkeypatch.")
+        # Monkeypatch approach: temporarily modify model_lora_keys_unet to include ZiT support
+        # This replicates the logic from the ComfyUI commit
+        original_model_lora_keys_unet = comfy.lora.model_lora_keys_unet
+        
+        def patched_model_lora_keys_unet(model, key_map={}):
+            # Call the original function first
+            key_map = original_model_lora_keys_unet(model, key_map)
+            
+            # Add ZiT-specific mappings if it's a Lumina2 model
+            if isinstance(model, comfy.model_base.Lumina2):
+                diffusers_keys = z_image_to_diffusers(model.model_config.unet_config, output_prefix="diffusion_model.")
+                for k in diffusers_keys:
+                    to = diffusers_keys[k]
+                    key_lora = k[:-len(".weight")]
+                    key_map["diffusion_model.{}".format(key_lora)] = to
+                    key_map["lycoris_{}".format(key_lora.replace(".", "_"))] = to
+            
+            return key_map
+        
+        # Temporarily replace the function
+        comfy.lora.model_lora_keys_unet = patched_model_lora_keys_unet
+        
+        try:
+            # Use the standard loading path, which will now use our patched function
+            return comfy.sd.load_lora_for_models(model_lora, clip_lora, lora, wModel, wClip)
+        finally:
+            # Always restore the original function
+            comfy.lora.model_lora_keys_unet = original_model_lora_keys_unet
+
 NODE_CLASS_MAPPINGS = {
     "LoraTagLoader": LoraTagLoader,
 }
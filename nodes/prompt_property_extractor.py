@@ -5,12 +5,40 @@ import comfy.sd
 import comfy.utils
 import comfy.model_management
 import os
+from types import SimpleNamespace
 from ..utils.file_utils import find_best_match
-from ..utils.settings_utils import is_prompt_property_extractor_console_log_enabled, is_lora_fuzzy_search_enabled
+from ..utils.model_load_cache import ModelCacheLease, find_model_file, load_checkpoint, load_clip, load_vae
+from ..utils.settings_utils import is_prompt_property_extractor_console_log_enabled, is_lora_fuzzy_search_enabled, get_model_cache_memory_gb
 from .wildcard_processor import WildcardProcessor
 from comfy.samplers import SCHEDULER_NAMES  # Official global scheduler list – the correct one
 
 
+# Regex supports escaped \> within tags: <neg:(cat:1.5)\, ugly>
+# Pattern: <(content)> where content can include \> as literal >
+_TAG_PATTERN = re.compile(r"<((?:[^>\\]|\\.)*)>")
+
+
+def scan_tags(text):
+    """
+    Split a prompt into its property tags and the text around them in a
+    single pass. Returns (tags, cleaned): the tag contents in order, with
+    escaped '>' and backslashes unescaped, and the text with every tag
+    removed and whitespace collapsed to single spaces. Tags containing
+    escapes are left in the cleaned text, as the extractor always did.
+    """
+    tags = []
+    pieces = []
+    last = 0
+    for match in _TAG_PATTERN.finditer(text):
+        raw = match.group(1)
+        tag = raw.replace(r'\>', '>').replace(r'\\', '\\')
+        tags.append(tag)
+        pieces.append(text[last:match.start()] if tag == raw else text[last:match.end()])
+        last = match.end()
+    pieces.append(text[last:])
+    return tags, " ".join("".join(pieces).split())
+
+
 class PromptPropertyExtractor:
     """
     A node to parse a string for sampler and model settings.
@@ -74,24 +102,57 @@ class PromptPropertyExtractor:
     FUNCTION = "parse_settings"
     CATEGORY = "⚡ MNeMiC Nodes"
 
+    # Tag name -> handler method. Tag names not listed here are passed through
+    # on the other_tags output.
+    TAG_HANDLERS = {
+        "checkpoint": "_tag_checkpoint", "model": "_tag_checkpoint", "ckpt": "_tag_checkpoint",
+        "clip": "_tag_clip",
+        "vae": "_tag_vae",
+        "cfg": "_tag_cfg",
+        "sampler": "_tag_sampler", "sampler_name": "_tag_sampler",
+        "scheduler": "_tag_scheduler",
+        "steps": "_tag_steps", "step": "_tag_steps",
+        "denoise": "_tag_denoise",
+        "width": "_tag_width",
+        "height": "_tag_height",
+        "resolution": "_tag_resolution", "res": "_tag_resolution",
+        "seed": "_tag_seed",
+        "start_step": "_tag_start_step", "start": "_tag_start_step", "start_at_step": "_tag_start_step",
+        "end_step": "_tag_end_step", "end": "_tag_end_step", "end_at_step": "_tag_end_step",
+        "lora": "_tag_lora",
+        "pos": "_tag_positive", "positive": "_tag_positive",
+        "neg": "_tag_negative", "negative": "_tag_negative",
+    }
+
     def __init__(self):
-        pass
+        # Holds the cached checkpoint/CLIP/VAE this node returned last, so
+        # other nodes loading models can't evict them while still in use.
+        self.model_lease = ModelCacheLease()
 
     def parse_settings(self, input_string, load_clip_from_checkpoint, load_vae_from_checkpoint, cfg, steps, sampler_name, denoise, width, height, seed, start_step, end_step, model=None, clip=None, vae=None):
+        with self.model_lease:
+            return self._parse_settings(input_string, load_clip_from_checkpoint, load_vae_from_checkpoint, cfg, steps, sampler_name, denoise, width, height, seed, start_step, end_step, model, clip, vae)
+
+    def _parse_settings(self, input_string, load_clip_from_checkpoint, load_vae_from_checkpoint, cfg, steps, sampler_name, denoise, width, height, seed, start_step, end_step, model=None, clip=None, vae=None):
         console_log = is_prompt_property_extractor_console_log_enabled()
 
         # Initialize with default values
-        out_model, out_clip, out_vae = model, clip, vae
-        out_cfg, out_steps, out_sampler, out_denoise = cfg, steps, sampler_name, denoise
-        out_scheduler = 'normal'  # Hardcoded default since scheduler input/output is disabled
-        out_width, out_height, out_seed, out_start_step, out_end_step = width, height, seed, start_step, end_step
+        state = SimpleNamespace(
+            model=model, clip=clip, vae=vae,
+            cfg=cfg, steps=steps, sampler=sampler_name, denoise=denoise,
+            scheduler='normal',  # Hardcoded default since scheduler input/output is disabled
+            width=width, height=height, seed=seed, start_step=start_step, end_step=end_step,
+            load_clip_from_checkpoint=load_clip_from_checkpoint,
+            load_vae_from_checkpoint=load_vae_from_checkpoint,
+            # Flags to track if CLIP/VAE were set by explicit tags
+            clip_set_by_tag=False, vae_set_by_tag=False,
+            res_override=None,  # To store resolution tag values
+            loras=[], positive_parts=[], negative_parts=[], other_tags=[],
+            cache_gb=get_model_cache_memory_gb(), console_log=console_log,
+        )
 
         # Initialize wildcard processor to handle wildcard logic
         wildcard_processor = WildcardProcessor()
-        other_tags = []
-        loras_to_apply = []
-        positive_parts = []
-        negative_parts = []
         if console_log:
             print(f"\n{'=' * 30} Prompt Property Extractor {'=' * 30}")
             print(f"[INPUT] {repr(input_string)}")
@@ -99,7 +160,7 @@ class PromptPropertyExtractor:
         # STEP 1: Process wildcards FIRST (before tag extraction)
         string_with_wildcards_resolved = wildcard_processor.process_wildcards(
             wildcard_string=input_string,
-            seed=out_seed,
+            seed=state.seed,
             multiple_separator=" ",
             recache_wildcards=False,
             tag_extraction_tags=""
@@ -108,221 +169,45 @@ class PromptPropertyExtractor:
         if console_log and input_string != string_with_wildcards_resolved:
             print(f"[WILDCARDS RESOLVED] {repr(string_with_wildcards_resolved)}")
 
-        # STEP 2: Find all property tags in the wildcard-resolved string
-        # Regex supports escaped \> within tags: <neg:(cat:1.5)\, ugly>
-        # Pattern: <(content)> where content can include \> as literal >
-        tags_raw = re.findall(r"<((?:[^>\\]|\\.)*)>", string_with_wildcards_resolved)
-
-        # Unescape \> to > and \\ to \ in tag content
-        tags = []
-        for tag_raw in tags_raw:
-            tag_unescaped = tag_raw.replace(r'\>', '>').replace(r'\\', '\\')
-            tags.append(tag_unescaped)
+        # STEP 2: Scan the string once: collect the tags and the text between them
+        tags, cleaned_string_final = scan_tags(string_with_wildcards_resolved)
 
         if console_log and tags:
             print(f"[TAGS FOUND] {len(tags)} tags: {tags}")
 
-        # STEP 3: Process each tag
-        # Flags to track if CLIP/VAE were set by explicit tags
-        clip_set_by_tag = False
-        vae_set_by_tag = False
-        res_override = None # To store resolution tag values
-
-        # STEP 3: Process each tag
+        # STEP 3: Process each tag through the handler table
         for tag in tags:
             # Split only on first colon to get tag_name and value
             # This preserves colons in the value
             parts_initial = tag.split(':', 1)
             tag_name = parts_initial[0].lower().strip()
             tag_value = parts_initial[1] if len(parts_initial) > 1 else ""
-            
-            try:
-                if (tag_name == "checkpoint" or tag_name == "model" or tag_name == "ckpt") and tag_value:
-                    ckpt_name = tag_value
-                    ckpt_filename = find_best_match(ckpt_name, folder_paths.get_filename_list("checkpoints"), log=False, fuzzy_search=is_lora_fuzzy_search_enabled())
-                    if ckpt_filename:
-                        ckpt_path = folder_paths.get_full_path("checkpoints", ckpt_filename)
-                        if ckpt_path and os.path.exists(ckpt_path):
-                            if console_log:
-                                print(f"  [CHECKPOINT] <{tag}> -> {os.path.basename(ckpt_path)}")
-                            normalized_ckpt_path = os.path.normpath(os.path.abspath(ckpt_path)).replace('\\', '/')
-                            loaded_checkpoint = comfy.sd.load_checkpoint_guess_config(normalized_ckpt_path)
-                            out_model = loaded_checkpoint[0]
-
-                            # Only load CLIP from checkpoint if NOT already set by a tag AND enabled
-                            if load_clip_from_checkpoint and not clip_set_by_tag:
-                                out_clip = loaded_checkpoint[1]
-                            elif clip_set_by_tag:
-                                if console_log:
-                                    print(f"  [INFO] Checkpoint CLIP ignored because <clip> tag was present.")
-
-                            # Only load VAE from checkpoint if NOT already set by a tag AND enabled
-                            if load_vae_from_checkpoint and not vae_set_by_tag:
-                                out_vae = loaded_checkpoint[2]
-                            elif vae_set_by_tag:
-                                if console_log:
-                                    print(f"  [INFO] Checkpoint VAE ignored because <vae> tag was present.")
-
-                elif tag_name == "clip" and tag_value:
-                    clip_name = tag_value.strip()
-                    clip_filename = find_best_match(clip_name, folder_paths.get_filename_list("clip"), log=False, fuzzy_search=is_lora_fuzzy_search_enabled())
-                    if clip_filename:
-                        clip_path = folder_paths.get_full_path("clip", clip_filename)
-                        if clip_path and os.path.exists(clip_path):
-                            if console_log:
-                                print(f"  [CLIP] <{tag}> -> {os.path.basename(clip_path)}")
-                            normalized_clip_path = os.path.normpath(os.path.abspath(clip_path)).replace('\\', '/')
-                            out_clip = comfy.sd.load_clip(ckpt_paths=[normalized_clip_path])
-                            clip_set_by_tag = True
-
-                elif tag_name == "vae" and tag_value:
-                    vae_name = tag_value.strip()
-                    vae_filename = find_best_match(vae_name, folder_paths.get_filename_list("vae"), log=False, fuzzy_search=is_lora_fuzzy_search_enabled())
-                    if vae_filename:
-                        vae_path = folder_paths.get_full_path("vae", vae_filename)
-                        if vae_path and os.path.exists(vae_path):
-                            if console_log:
-                                print(f"  [VAE] <{tag}> -> {os.path.basename(vae_path)}")
-                            vae_sd = comfy.utils.load_torch_file(vae_path)
-                            out_vae = comfy.sd.VAE(sd=vae_sd)
-                            vae_set_by_tag = True
-
-                elif tag_name == "cfg" and tag_value:
-                    out_cfg = max(1.0, float(tag_value))
-                    if console_log:
-                        print(f"  [CFG] <{tag}> -> {out_cfg}")
-
-                elif (tag_name == "sampler" or tag_name == "sampler_name") and tag_value:
-                    sampler_match = find_best_match(tag_value.strip(), comfy.samplers.KSampler.SAMPLERS)
-                    if sampler_match:
-                        out_sampler = sampler_match
-                        if console_log:
-                            print(f"  [SAMPLER] <{tag}> -> {out_sampler}")
-
-                elif tag_name == "scheduler" and tag_value:
-                    scheduler_match = find_best_match(tag_value.strip(), list(SCHEDULER_NAMES))
-                    if scheduler_match:
-                        out_scheduler = scheduler_match
-                        if console_log:
-                            print(f"  [SCHEDULER] <{tag}> -> {out_scheduler}")
-
-                elif (tag_name == "steps" or tag_name == "step") and tag_value:
-                    out_steps = max(1, int(tag_value))
-                    if console_log:
-                        print(f"  [STEPS] <{tag}> -> {out_steps}")
-
-                elif tag_name == "denoise" and tag_value:
-                    out_denoise = max(0.0, min(1.0, float(tag_value)))
-                    if console_log:
-                        print(f"  [DENOISE] <{tag}> -> {out_denoise}")
-
-                elif tag_name == "width" and tag_value:
-                    out_width = int(tag_value)
-                    if console_log:
-                        print(f"  [WIDTH] <{tag}> -> {out_width}")
-
-                elif tag_name == "height" and tag_value:
-                    out_height = int(tag_value)
-                    if console_log:
-                        print(f"  [HEIGHT] <{tag}> -> {out_height}")
-
-                elif (tag_name == "resolution" or tag_name == "res") and tag_value:
-                    res_string = tag_value.strip()
-                    if 'x' in res_string:
-                        res_parts = res_string.split('x')
-                    elif ':' in res_string:
-                        res_parts = res_string.split(':')
-                    else:
-                        res_parts = []
-
-                    if len(res_parts) == 2:
-                        try:
-                            r_width = int(res_parts[0].strip())
-                            r_height = int(res_parts[1].strip())
-                            res_override = (r_width, r_height)
-                            if console_log:
-                                print(f"  [RESOLUTION] <{tag}> -> {r_width}x{r_height}")
-                        except ValueError:
-                            print(f"  [ERROR] Invalid resolution format: {res_string}")
-
-                elif tag_name == "seed" and tag_value:
-                    out_seed = int(tag_value)
-                    if console_log:
-                        print(f"  [SEED] <{tag}> -> {out_seed}")
-
-                elif (tag_name == "start_step" or tag_name == "start" or tag_name == "start_at_step") and tag_value:
-                    out_start_step = int(tag_value)
-                    if console_log:
-                        print(f"  [START STEP] <{tag}> -> {out_start_step}")
-
-                elif (tag_name == "end_step" or tag_name == "end" or tag_name == "end_at_step") and tag_value:
-                    out_end_step = int(tag_value)
-                    if console_log:
-                        print(f"  [END STEP] <{tag}> -> {out_end_step}")
-
-                elif tag_name == "lora" and tag_value:
-                    # LoRA needs special handling: name:model_weight:clip_weight
-                    # Supported formats:
-                    # <lora:name> -> weight 1.0, clip 1.0
-                    # <lora:name:weight> -> weight, clip=weight
-                    # <lora:name:model_weight:clip_weight>
-                    
-                    lora_parts = tag_value.split(':')
-                    lora_name = lora_parts[0].strip()
-                    lora_model_weight = 1.0
-                    lora_clip_weight = 1.0
-                    
-                    if len(lora_parts) > 1 and lora_parts[1]:
-                        try:
-                            lora_model_weight = float(lora_parts[1].strip())
-                            lora_clip_weight = lora_model_weight # Default clip to model weight
-                        except ValueError:
-                            print(f"  [WARNING] Invalid LoRA weight: {lora_parts[1]}")
-                    
-                    if len(lora_parts) > 2 and lora_parts[2]:
-                        try:
-                            lora_clip_weight = float(lora_parts[2].strip())
-                        except ValueError:
-                            print(f"  [WARNING] Invalid LoRA CLIP weight: {lora_parts[2]}")
-
-                    lora_filename = find_best_match(lora_name, folder_paths.get_filename_list("loras"), log=False, fuzzy_search=is_lora_fuzzy_search_enabled())
-                    if lora_filename:
-                        lora_path = folder_paths.get_full_path("loras", lora_filename)
-                        if lora_path and os.path.exists(lora_path):
-                            if console_log:
-                                print(f"  [LORA QUEUED] <{tag}> -> {os.path.basename(lora_path)} (Model: {lora_model_weight}, CLIP: {lora_clip_weight})")
-                            loras_to_apply.append((lora_path, lora_model_weight, lora_clip_weight))
-
-                elif (tag_name == "pos" or tag_name == "positive") and tag_value:
-                    pos_value = tag_value.strip()
-                    positive_parts.append(pos_value)
-                    if console_log:
-                        print(f"  [POS] <{tag}> -> {pos_value}")
-
-                elif (tag_name == "neg" or tag_name == "negative") and tag_value:
-                    neg_value = tag_value.strip()
-                    negative_parts.append(neg_value)
-                    if console_log:
-                        print(f"  [NEG] <{tag}> -> {neg_value}")
-
-                elif tag_name not in ["checkpoint", "model", "ckpt", "clip", "vae", "cfg", "sampler", "sampler_name", "scheduler", "steps", "step", "denoise", "width", "height", "resolution", "res", "seed", "start_step", "start", "start_at_step", "end_step", "end", "end_at_step", "lora", "neg", "negative", "pos", "positive"]:
-                    other_tags.append(f"<{tag}>")
 
+            handler = self.TAG_HANDLERS.get(tag_name)
+            if handler is None:
+                state.other_tags.append(f"<{tag}>")
+                continue
+            if not tag_value:
+                continue
+            try:
+                getattr(self, handler)(state, tag, tag_value)
             except (ValueError, IndexError) as e:
                 print(f"  [ERROR] Error parsing tag '{tag}': {e}")
 
         # Apply resolution override if present
-        if res_override:
-            out_width, out_height = res_override
+        if state.res_override:
+            state.width, state.height = state.res_override
             if console_log:
-                print(f"  [INFO] Resolution tag override applied: {out_width}x{out_height}")
+                print(f"  [INFO] Resolution tag override applied: {state.width}x{state.height}")
 
-        # STEP 4: Create the cleaned_string by removing all property tags
-        cleaned_string_final = string_with_wildcards_resolved
-        for tag in tags:
-            cleaned_string_final = cleaned_string_final.replace(f"<{tag}>", "")
+        out_model, out_clip, out_vae = state.model, state.clip, state.vae
+        out_cfg, out_steps, out_sampler, out_denoise = state.cfg, state.steps, state.sampler, state.denoise
+        out_width, out_height, out_seed = state.width, state.height, state.seed
+        out_start_step, out_end_step = state.start_step, state.end_step
+        loras_to_apply = state.loras
+        positive_parts, negative_parts, other_tags = state.positive_parts, state.negative_parts, state.other_tags
 
-        # STEP 5: Apply LoRAs
+        # STEP 4: Apply LoRAs
         if loras_to_apply and out_model and out_clip:
             for lora_path, lora_model_weight, lora_clip_weight in loras_to_apply:
                 try:
@@ -333,8 +218,8 @@ class PromptPropertyExtractor:
                 except Exception as e:
                     print(f"  [ERROR] Failed to load LoRA {lora_path}: {e}")
 
-        # Final cleaning of the string (collapse multiple spaces)
-        cleaned_string = re.sub(r"\s+", " ", cleaned_string_final).strip()
+        # The scanner already collapsed whitespace in the cleaned string
+        cleaned_string = cleaned_string_final
         
         # Combine multiple positive/negative tag values with ", "
         positive_string = ", ".join(positive_parts)
@@ -392,6 +277,169 @@ class PromptPropertyExtractor:
         return (out_model, out_clip, out_vae, pos_conditioning, neg_conditioning, out_latent, out_seed, out_steps, out_cfg, out_sampler, out_denoise, out_start_step, out_end_step, cleaned_string, negative_string, other_tags_str, string_with_wildcards_resolved, out_width, out_height)
 
 
+    # --- Tag handlers ---
+    # Each handler gets the parse state, the full tag (for logging) and the
+    # non-empty tag value, and updates the state in place.
+
+    def _tag_checkpoint(self, state, tag, tag_value):
+        ckpt_path = find_model_file("checkpoints", tag_value, fuzzy_search=is_lora_fuzzy_search_enabled())
+        if not ckpt_path or not os.path.exists(ckpt_path):
+            return
+        if state.console_log:
+            print(f"  [CHECKPOINT] <{tag}> -> {os.path.basename(ckpt_path)}")
+        normalized_ckpt_path = os.path.normpath(os.path.abspath(ckpt_path)).replace('\\', '/')
+        loaded_checkpoint = load_checkpoint(normalized_ckpt_path, state.cache_gb, console_log=state.console_log, lease=self.model_lease)
+        state.model = loaded_checkpoint[0]
+
+        # Only load CLIP from checkpoint if NOT already set by a tag AND enabled
+        if state.load_clip_from_checkpoint and not state.clip_set_by_tag:
+            state.clip = loaded_checkpoint[1]
+        elif state.clip_set_by_tag:
+            if state.console_log:
+                print(f"  [INFO] Checkpoint CLIP ignored because <clip> tag was present.")
+
+        # Only load VAE from checkpoint if NOT already set by a tag AND enabled
+        if state.load_vae_from_checkpoint and not state.vae_set_by_tag:
+            state.vae = loaded_checkpoint[2]
+        elif state.vae_set_by_tag:
+            if state.console_log:
+                print(f"  [INFO] Checkpoint VAE ignored because <vae> tag was present.")
+
+    def _tag_clip(self, state, tag, tag_value):
+        clip_path = find_model_file("clip", tag_value.strip(), fuzzy_search=is_lora_fuzzy_search_enabled())
+        if not clip_path or not os.path.exists(clip_path):
+            return
+        if state.console_log:
+            print(f"  [CLIP] <{tag}> -> {os.path.basename(clip_path)}")
+        normalized_clip_path = os.path.normpath(os.path.abspath(clip_path)).replace('\\', '/')
+        state.clip = load_clip(normalized_clip_path, state.cache_gb, console_log=state.console_log, lease=self.model_lease)
+        state.clip_set_by_tag = True
+
+    def _tag_vae(self, state, tag, tag_value):
+        vae_path = find_model_file("vae", tag_value.strip(), fuzzy_search=is_lora_fuzzy_search_enabled())
+        if not vae_path or not os.path.exists(vae_path):
+            return
+        if state.console_log:
+            print(f"  [VAE] <{tag}> -> {os.path.basename(vae_path)}")
+        state.vae = load_vae(vae_path, state.cache_gb, console_log=state.console_log, lease=self.model_lease)
+        state.vae_set_by_tag = True
+
+    def _tag_cfg(self, state, tag, tag_value):
+        state.cfg = max(1.0, float(tag_value))
+        if state.console_log:
+            print(f"  [CFG] <{tag}> -> {state.cfg}")
+
+    def _tag_sampler(self, state, tag, tag_value):
+        sampler_match = find_best_match(tag_value.strip(), comfy.samplers.KSampler.SAMPLERS)
+        if sampler_match:
+            state.sampler = sampler_match
+            if state.console_log:
+                print(f"  [SAMPLER] <{tag}> -> {state.sampler}")
+
+    def _tag_scheduler(self, state, tag, tag_value):
+        scheduler_match = find_best_match(tag_value.strip(), list(SCHEDULER_NAMES))
+        if scheduler_match:
+            state.scheduler = scheduler_match
+            if state.console_log:
+                print(f"  [SCHEDULER] <{tag}> -> {state.scheduler}")
+
+    def _tag_steps(self, state, tag, tag_value):
+        state.steps = max(1, int(tag_value))
+        if state.console_log:
+            print(f"  [STEPS] <{tag}> -> {state.steps}")
+
+    def _tag_denoise(self, state, tag, tag_value):
+        state.denoise = max(0.0, min(1.0, float(tag_value)))
+        if state.console_log:
+            print(f"  [DENOISE] <{tag}> -> {state.denoise}")
+
+    def _tag_width(self, state, tag, tag_value):
+        state.width = int(tag_value)
+        if state.console_log:
+            print(f"  [WIDTH] <{tag}> -> {state.width}")
+
+    def _tag_height(self, state, tag, tag_value):
+        state.height = int(tag_value)
+        if state.console_log:
+            print(f"  [HEIGHT] <{tag}> -> {state.height}")
+
+    def _tag_resolution(self, state, tag, tag_value):
+        res_string = tag_value.strip()
+        if 'x' in res_string:
+            res_parts = res_string.split('x')
+        elif ':' in res_string:
+            res_parts = res_string.split(':')
+        else:
+            res_parts = []
+
+        if len(res_parts) == 2:
+            try:
+                r_width = int(res_parts[0].strip())
+                r_height = int(res_parts[1].strip())
+                state.res_override = (r_width, r_height)
+                if state.console_log:
+                    print(f"  [RESOLUTION] <{tag}> -> {r_width}x{r_height}")
+            except ValueError:
+                print(f"  [ERROR] Invalid resolution format: {res_string}")
+
+    def _tag_seed(self, state, tag, tag_value):
+        state.seed = int(tag_value)
+        if state.console_log:
+            print(f"  [SEED] <{tag}> -> {state.seed}")
+
+    def _tag_start_step(self, state, tag, tag_value):
+        state.start_step = int(tag_value)
+        if state.console_log:
+            print(f"  [START STEP] <{tag}> -> {state.start_step}")
+
+    def _tag_end_step(self, state, tag, tag_value):
+        state.end_step = int(tag_value)
+        if state.console_log:
+            print(f"  [END STEP] <{tag}> -> {state.end_step}")
+
+    def _tag_lora(self, state, tag, tag_value):
+        # LoRA needs special handling: name:model_weight:clip_weight
+        # Supported formats:
+        # <lora:name> -> weight 1.0, clip 1.0
+        # <lora:name:weight> -> weight, clip=weight
+        # <lora:name:model_weight:clip_weight>
+        lora_parts = tag_value.split(':')
+        lora_name = lora_parts[0].strip()
+        lora_model_weight = 1.0
+        lora_clip_weight = 1.0
+
+        if len(lora_parts) > 1 and lora_parts[1]:
+            try:
+                lora_model_weight = float(lora_parts[1].strip())
+                lora_clip_weight = lora_model_weight # Default clip to model weight
+            except ValueError:
+                print(f"  [WARNING] Invalid LoRA weight: {lora_parts[1]}")
+
+        if len(lora_parts) > 2 and lora_parts[2]:
+            try:
+                lora_clip_weight = float(lora_parts[2].strip())
+            except ValueError:
+                print(f"  [WARNING] Invalid LoRA CLIP weight: {lora_parts[2]}")
+
+        lora_path = find_model_file("loras", lora_name, fuzzy_search=is_lora_fuzzy_search_enabled())
+        if lora_path and os.path.exists(lora_path):
+            if state.console_log:
+                print(f"  [LORA QUEUED] <{tag}> -> {os.path.basename(lora_path)} (Model: {lora_model_weight}, CLIP: {lora_clip_weight})")
+            state.loras.append((lora_path, lora_model_weight, lora_clip_weight))
+
+    def _tag_positive(self, state, tag, tag_value):
+        pos_value = tag_value.strip()
+        state.positive_parts.append(pos_value)
+        if state.console_log:
+            print(f"  [POS] <{tag}> -> {pos_value}")
+
+    def _tag_negative(self, state, tag, tag_value):
+        neg_value = tag_value.strip()
+        state.negative_parts.append(neg_value)
+        if state.console_log:
+            print(f"  [NEG] <{tag}> -> {neg_value}")
+
+
 NODE_CLASS_MAPPINGS = {
     "PromptPropertyExtractor": PromptPropertyExtractor
 }
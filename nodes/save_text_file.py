@@ -2,6 +2,7 @@ import os
 import re
 from typing import List
 from ..utils.replace_tokens import replace_tokens
+from ..utils.filename_allocator import release_filename, reserve_filename
 from folder_paths import get_output_directory
 
 def sanitize_filename(string):
@@ -111,48 +112,40 @@ class SaveTextFile:
         # Remove extension from output_name
         output_name = os.path.splitext(filename)[0]
 
-        self.writeTextFile(file_path, file_text)
+        try:
+            self.writeTextFile(file_path, file_text)
+        except Exception:
+            # Don't leave the empty reserved file behind.
+            if number_padding > 0:
+                release_filename(full_path, filename)
+            raise
 
         return file_path, output_name, full_path
 
     def generate_filename(self, path, prefix, suffix, separator, number_padding, extension):
-        """Generate a unique filename based on the provided parameters."""
-        pattern_parts = [re.escape(prefix)]
-        if number_padding > 0:
-            pattern_parts.append(f"{separator}(\\d{{{number_padding}}})")
+        """Generate (and reserve) a unique filename based on the provided parameters."""
+        if number_padding <= 0:
+            # Without a counter the name is fixed and the file is overwritten.
+            return f"{prefix}{suffix}{extension}", 1
+
+        pattern_parts = [re.escape(prefix), f"{re.escape(separator)}(\\d{{{number_padding}}})"]
         if suffix:
-            pattern_parts.append(f"{separator}{re.escape(suffix)}")
+            pattern_parts.append(f"{re.escape(separator)}{re.escape(suffix)}")
         pattern_parts.append(re.escape(extension))
+        pattern = re.compile(''.join(pattern_parts))
 
-        pattern = ''.join(pattern_parts)
-        
-        # Find existing counters
-        existing_counters = []
-        for filename in os.listdir(path):
-            match = re.match(pattern, filename)
-            if match:
-                try:
-                    counter_value = int(match.group(1)) if number_padding > 0 else 0
-                    existing_counters.append(counter_value)
-                except (IndexError, ValueError):
-                    continue
-
-        existing_counters.sort(reverse=True)
-
-        # Determine the next counter value
-        counter = existing_counters[0] + 1 if existing_counters else 1
-        counter_str = f"{counter:0{number_padding}}" if number_padding > 0 else ""
-
-        # Construct the filename
-        if number_padding > 0:
+        def format_name(counter):
+            counter_str = f"{counter:0{number_padding}}"
             if suffix:
-                filename = f"{prefix}{separator}{counter_str}{separator}{suffix}{extension}"
-            else:
-                filename = f"{prefix}{separator}{counter_str}{extension}"
-        else:
-            filename = f"{prefix}{suffix}{extension}"
+                return f"{prefix}{separator}{counter_str}{separator}{suffix}{extension}"
+            return f"{prefix}{separator}{counter_str}{extension}"
+
+        def parse_counter(filename):
+            match = pattern.match(filename)
+            return int(match.group(1)) if match else None
 
-        return filename, counter
+        key = ("text", prefix, suffix, separator, number_padding, extension)
+        return reserve_filename(path, key, format_name, parse_counter, start=1)
 
     def writeTextFile(self, file, content):
         """Write the content to the specified file."""
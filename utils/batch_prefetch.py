@@ -0,0 +1,106 @@
+"""
+Ordered background prefetch for the Batch Wildcard Sampler.
+
+The sampler's per-item loop is serial: load the item's LoRA files, tokenize its
+prompts, sample, upscale, then move on. The CPU/disk part of the next items
+(matching and reading LoRA files) doesn't depend on the current item, so a
+worker thread prepares up to `depth` items ahead while the current one samples.
+
+Only work that is safe off the execution thread runs here. Tokenizing stays on
+the execution thread (Hugging Face tokenizers are not thread-safe and fail with
+"Already borrowed" when used from two threads), as does anything that touches
+ComfyUI's model management (patching weights, CLIP encode, sampling, VAE
+decode/encode), because model loading and offloading are not thread-safe.
+
+Items are always handed out in the given order, and an exception raised while
+preparing item i is re-raised when item i is consumed, so results are identical
+to running `prepare` inline. With depth 0 everything runs inline.
+"""
+
+import queue
+import threading
+
+# Put on the queue when the worker exits, after its last item.
+_DONE = object()
+
+
+class OrderedPrefetcher:
+    """
+    Iterate over (index, prepare(index)) for index in `indices`, preparing
+    up to `depth` items ahead on a background thread. Use as a context manager
+    so the worker is always stopped, even when the consumer raises.
+    """
+
+    def __init__(self, indices, prepare, depth=2):
+        self.indices = list(indices)
+        self.prepare = prepare
+        self.depth = max(0, int(depth))
+        self._queue = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if self.depth > 0 and len(self.indices) > 1:
+            self._queue = queue.Queue(maxsize=self.depth)
+            self._thread = threading.Thread(target=self._produce, name="mnemic-batch-prefetch", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __iter__(self):
+        for index in self.indices:
+            if self._queue is None:
+                yield index, self.prepare(index)
+                continue
+            item = self._queue.get()
+            if item is _DONE:
+                raise RuntimeError("Batch prefetch worker stopped before preparing every item.")
+            got_index, result, error = item
+            if error is not None:
+                raise error
+            yield got_index, result
+
+    def close(self):
+        """
+        Stop the worker and wait for it to exit, so `prepare` never runs
+        alongside the caller once close() returns.
+        """
+        self._stop.set()
+        if self._thread is None:
+            return
+        while self._thread.is_alive():
+            # Drain so a producer blocked on a full queue can see the stop flag.
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._thread.join(timeout=0.1)
+        self._thread = None
+
+    def _produce(self):
+        try:
+            for index in self.indices:
+                if self._stop.is_set():
+                    return
+                try:
+                    item = (index, self.prepare(index), None)
+                except BaseException as e:
+                    item = (index, None, e)
+                self._put(item)
+                if item[2] is not None:
+                    return
+        finally:
+            # Always end with a sentinel, so the consumer can never wait forever.
+            self._put(_DONE)
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
@@ -0,0 +1,168 @@
+"""
+Resumable batches for the Batch Wildcard Sampler.
+
+With resume enabled, every finished latent is written to
+<ComfyUI user directory>/mnemic_cache/batch_latents as soon as it completes,
+together with its resolved prompt, seed and LoRA stack. If the batch is
+interrupted (crash, OOM, cancelled queue), re-running it with the same inputs
+loads the finished items from disk and only samples the missing ones.
+
+Each item has its own key, built from everything that decides its output:
+the upstream graph feeding the sampler (checkpoint, LoRA loaders, ... taken
+from the API prompt), the item's resolved prompts and seed, the sampling and
+upscale settings, and the size/mtime of every LoRA file it loads. Changing
+any of those gives a new key, so stale latents are never reused.
+
+Files are grouped in one subfolder per scope: the sampler node's id together
+with its upstream graph. The files of a batch are removed once the whole batch
+has completed. Starting a batch removes the files in its own scope whose keys
+no longer match (e.g. after a wildcard or LoRA file changed), and whole scopes
+left untouched for RESUME_MAX_AGE_DAYS, so the folder can't grow without
+bound. Other sampler nodes and other workflows keep their partial batches.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import comfy.utils
+
+from .cache_utils import get_cache_directory
+
+# Scopes (sampler node + upstream graph) nobody has written to for this long
+# are removed when any batch starts.
+RESUME_MAX_AGE_DAYS = 7
+
+
+def upstream_signature(prompt, node_id):
+    """
+    Hash of every node feeding `node_id` in the API prompt (class and literal
+    inputs), excluding the node itself. Returns None when the prompt isn't
+    available, in which case resume can't tell runs apart and is skipped.
+    """
+    if not isinstance(prompt, dict) or node_id is None or str(node_id) not in prompt:
+        return None
+
+    parts = {}
+    pending = [str(node_id)]
+    while pending:
+        current = pending.pop()
+        node = prompt.get(current)
+        if not isinstance(node, dict):
+            continue
+        literals = {}
+        for name, value in node.get("inputs", {}).items():
+            if isinstance(value, list) and len(value) == 2:
+                linked = str(value[0])
+                literals[name] = ["link", linked, value[1]]
+                if linked not in parts and linked not in pending:
+                    pending.append(linked)
+            else:
+                literals[name] = value
+        if current != str(node_id):
+            parts[current] = [node.get("class_type"), literals]
+
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def item_key(*parts):
+    """Stable key for one batch item from JSON-serialisable parts."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def resume_scope(node_id, upstream):
+    """Subfolder name for the resume files of one sampler node and upstream graph."""
+    return item_key(str(node_id), upstream)[:24]
+
+
+def _scope_dir(scope):
+    return os.path.join(get_cache_directory("batch_latents"), scope)
+
+
+def _item_path(scope, key):
+    return os.path.join(_scope_dir(scope), f"{key[:40]}.safetensors")
+
+
+def has_item(scope, key):
+    """Whether an item's latent was saved by an earlier run."""
+    return os.path.exists(_item_path(scope, key))
+
+
+def load_item(scope, key):
+    """The saved latent for an item, or None when it hasn't completed before."""
+    path = _item_path(scope, key)
+    if not os.path.exists(path):
+        return None
+    try:
+        return comfy.utils.load_torch_file(path, safe_load=True)["samples"]
+    except Exception as e:
+        print(f"BatchWildcardSampler Warning: Ignoring unreadable resume file '{path}': {e}")
+        return None
+
+
+def save_item(scope, key, samples, info):
+    """Write one finished latent. The file is written to a temp name and swapped in."""
+    path = _item_path(scope, key)
+    tmp_path = path + ".tmp"
+    metadata = {"mnemic_batch_item": json.dumps(info, default=str)}
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        comfy.utils.save_torch_file({"samples": samples.detach().cpu().contiguous()}, tmp_path, metadata=metadata)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"BatchWildcardSampler Warning: Could not write resume file '{path}': {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def prune_items(scope, keys):
+    """
+    Remove the files (and leftover temp files) in `scope` that aren't one of
+    `keys`, and every other scope untouched for RESUME_MAX_AGE_DAYS.
+    """
+    keep = {os.path.basename(_item_path(scope, key)) for key in keys}
+    directory = _scope_dir(scope)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        names = []
+    for name in names:
+        if name not in keep:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+    root = get_cache_directory("batch_latents")
+    cutoff = time.time() - RESUME_MAX_AGE_DAYS * 24 * 3600
+    try:
+        entries = list(os.scandir(root))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.name == scope or entry.stat().st_mtime >= cutoff:
+                continue
+            if entry.is_dir():
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                os.remove(entry.path)  # Files written before resume scopes existed.
+        except OSError:
+            pass
+
+
+def discard_items(scope, keys):
+    """Remove the resume files of a completed batch, and its scope once empty."""
+    for key in keys:
+        try:
+            os.remove(_item_path(scope, key))
+        except OSError:
+            pass
+    try:
+        os.rmdir(_scope_dir(scope))
+    except OSError:
+        pass
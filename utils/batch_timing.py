@@ -0,0 +1,39 @@
+"""
+Per-phase wall-clock timings for the Batch Wildcard Sampler.
+
+Each run adds up the time spent in its phases (wildcard resolve, LoRA loading,
+CLIP encoding, first-pass sampling, upscaling the latents, and the upscale
+pass's second sampling) and returns them as text on the node's
+`timings` output, so batch settings and ordering can be compared run to run.
+"""
+
+import time
+from contextlib import contextmanager
+
+PHASES = ("resolve", "lora", "encode", "sample", "upscale", "hires")
+
+
+class PhaseTimings:
+    """Accumulates seconds per phase; phases may be entered any number of times."""
+
+    def __init__(self):
+        self.seconds = {phase: 0.0 for phase in PHASES}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+    def format(self, title):
+        total = time.perf_counter() - self._started
+        lines = [title]
+        for name, seconds in self.seconds.items():
+            lines.append(f"  {name:<8} {seconds:8.2f}s")
+        other = max(0.0, total - sum(self.seconds.values()))
+        lines.append(f"  {'other':<8} {other:8.2f}s")
+        lines.append(f"  {'total':<8} {total:8.2f}s")
+        return "\n".join(lines)
@@ -0,0 +1,122 @@
+"""
+Shared cache helpers for the node pack.
+
+Caches that should survive a ComfyUI restart (fused LoRA stacks, indexes, etc.)
+live under <ComfyUI user directory>/mnemic_cache/<name>. The user directory is
+used rather than the temp directory because ComfyUI wipes temp on startup.
+
+In-memory caches use the bounded LRUCache below so they can't grow without limit.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import folder_paths
+
+CACHE_ROOT_NAME = "mnemic_cache"
+
+
+def get_cache_directory(name):
+    """Return (and create) the cache directory for one cache type."""
+    path = os.path.join(folder_paths.get_user_directory(), CACHE_ROOT_NAME, name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def file_signature(path):
+    """(absolute path, size, mtime_ns) for a file, or None when it can't be read."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+def tensor_nbytes(obj):
+    """Bytes held by the tensors in a (nested) list/tuple/dict value."""
+    if hasattr(obj, "element_size") and hasattr(obj, "nelement"):
+        return obj.element_size() * obj.nelement()
+    if isinstance(obj, dict):
+        return sum(tensor_nbytes(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(tensor_nbytes(v) for v in obj)
+    return 0
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU map with an item cap and an optional byte budget.
+
+    `size_fn(value)` returns the bytes a value holds. Entries are evicted
+    oldest-first until both limits are met; a value bigger than the whole
+    budget is never stored.
+    """
+
+    def __init__(self, max_items=None, max_bytes=None, size_fn=None):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.size_fn = size_fn or (lambda value: 0)
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        size = self.size_fn(value)
+        with self._lock:
+            self._pop_locked(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            self._evict_locked()
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._pop_locked(key)
+            return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def set_max_bytes(self, max_bytes):
+        """Change the byte budget, evicting entries that no longer fit."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict_locked()
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries.keys())
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _pop_locked(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+        return entry
+
+    def _evict_locked(self):
+        while self._entries and (
+            (self.max_items is not None and len(self._entries) > self.max_items)
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.total_bytes -= size
@@ -0,0 +1,162 @@
+"""
+Checkpoint catalog for the Load Random Checkpoint node.
+
+Building a checkpoint pool used to walk every listed directory and run
+difflib against every checkpoint name for each fuzzy line, which takes
+seconds on libraries with thousands of models. Two pieces make it cheap:
+
+- Directory catalog: the checkpoint paths found under a directory are
+  persisted to
+  <ComfyUI user directory>/mnemic_cache/checkpoint_catalog, together with the
+  mtime of every directory walked. Adding, removing or renaming a file changes
+  its directory's mtime, so a catalog is reused only while all recorded
+  directory mtimes still match, and rebuilt otherwise.
+- Name index: a trigram index over the checkpoint names. A fuzzy query is only
+  scored with difflib against the candidates sharing the most trigrams with
+  it first. The remaining names are only scored when SequenceMatcher's cheap
+  upper bounds say they could still reach the best score, so the matches are
+  the same as scoring every name.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+from .cache_utils import LRUCache, get_cache_directory
+
+CATALOG_VERSION = 2
+CHECKPOINT_EXTENSIONS = (".ckpt", ".safetensors")
+
+# How many trigram-ranked candidates a fuzzy query is scored against.
+FUZZY_SHORTLIST_SIZE = 64
+
+_lock = threading.Lock()
+_catalogs = {}
+_name_indexes = LRUCache(max_items=4)
+
+
+def normalize_name(path):
+    """Lowercase file name without extension, as used for matching."""
+    return os.path.splitext(os.path.basename(path))[0].lower()
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# --- Directory catalog ---
+
+def _catalog_path(root):
+    digest = hashlib.sha1(root.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(get_cache_directory("checkpoint_catalog"), f"{digest}.json")
+
+
+def _is_fresh(catalog):
+    """True while every directory recorded in the catalog has its recorded mtime."""
+    for directory, mtime in catalog["dirs"].items():
+        try:
+            if os.stat(directory).st_mtime_ns != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def _scan(root):
+    dirs = {}
+    files = []
+    for current, _, names in os.walk(root, followlinks=True):
+        try:
+            dirs[current] = os.stat(current).st_mtime_ns
+        except OSError:
+            continue
+        for name in names:
+            if name.endswith(CHECKPOINT_EXTENSIONS):
+                files.append(os.path.join(current, name))
+    return {"version": CATALOG_VERSION, "root": root, "dirs": dirs, "files": files}
+
+
+def _load(root):
+    try:
+        with open(_catalog_path(root), "r", encoding="utf-8") as f:
+            catalog = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if catalog.get("version") != CATALOG_VERSION or catalog.get("root") != root:
+        return None
+    return catalog
+
+
+def _save(catalog):
+    path = _catalog_path(catalog["root"])
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(catalog, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"LoadRandomCheckpoint Warning: Could not write checkpoint catalog '{path}': {e}")
+
+
+def directory_files(root, console_log=False):
+    """
+    Paths of every checkpoint file under `root`, from memory or disk while
+    fresh, rescanned otherwise.
+    """
+    root = os.path.abspath(root)
+    with _lock:
+        catalog = _catalogs.get(root)
+        if catalog is None:
+            catalog = _load(root)
+        if catalog is None or not _is_fresh(catalog):
+            if console_log:
+                print(f"Catalog > Scanning '{root}'...")
+            catalog = _scan(root)
+            _save(catalog)
+        elif console_log:
+            print(f"Catalog > Using cached catalog for '{root}' ({len(catalog['files'])} files).")
+        _catalogs[root] = catalog
+        return catalog["files"]
+
+
+# --- Name index ---
+
+class NameIndex:
+    """Trigram index over a list of checkpoint names (relative paths)."""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.basenames = [os.path.basename(n).lower() for n in self.names]
+        self.stems = [normalize_name(n) for n in self.names]
+        self.grams = {}
+        for i, stem in enumerate(self.stems):
+            for gram in _trigrams(stem):
+                self.grams.setdefault(gram, []).append(i)
+
+    def substring_matches(self, query):
+        """Names whose file name contains the (lowercased) query."""
+        query = query.lower()
+        return [self.names[i] for i, base in enumerate(self.basenames) if query in base]
+
+    def shortlist(self, query, limit=FUZZY_SHORTLIST_SIZE):
+        """
+        Indices of the names sharing the most trigrams with the query, best
+        first. Names sharing none can't score well with difflib and are skipped.
+        """
+        counts = {}
+        for gram in _trigrams(query.lower()):
+            for i in self.grams.get(gram, ()):
+                counts[i] = counts.get(i, 0) + 1
+        return sorted(counts, key=lambda i: (-counts[i], i))[:limit]
+
+
+def get_name_index(names):
+    """NameIndex for a name list, reused while the list is unchanged."""
+    key = hashlib.sha1("\n".join(names).encode("utf-8")).hexdigest()
+    index = _name_indexes.get(key)
+    if index is None:
+        index = NameIndex(names)
+        _name_indexes.put(key, index)
+    return index
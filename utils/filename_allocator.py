@@ -0,0 +1,88 @@
+"""
+Unique numbered filenames for the save nodes.
+
+Finding the next free counter used to list the whole output directory on
+every save, which gets slow once a folder holds thousands of images. The
+allocator scans a directory once per naming pattern, remembers the highest
+counter seen, and hands out the following numbers from memory.
+
+Each name is reserved by creating its file with O_CREAT | O_EXCL, so two
+saves (or two ComfyUI instances writing to the same folder) can never get the
+same name: if the file already exists the counter is advanced and the next
+number is tried. The caller then overwrites the empty reserved file.
+
+The directory's mtime is recorded after every reservation. When it differs
+on the next call, something else added or removed files, and the directory
+is rescanned so the numbering matches what is on disk.
+"""
+
+import os
+import threading
+
+from .cache_utils import LRUCache
+
+_lock = threading.Lock()
+_counters = LRUCache(max_items=256)  # (directory, pattern key) -> [next counter, dir mtime_ns]
+
+
+def _dir_mtime(directory):
+    try:
+        return os.stat(directory).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _scan(directory, parse_counter, start):
+    """Next counter after the highest one parse_counter finds in the directory."""
+    highest = None
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        names = []
+    for name in names:
+        counter = parse_counter(name)
+        if counter is not None and (highest is None or counter > highest):
+            highest = counter
+    return start if highest is None else max(start, highest + 1)
+
+
+def reserve_filename(directory, key, format_name, parse_counter, start=1):
+    """
+    Reserve and return (filename, counter) for the next free counter.
+
+    `format_name(counter)` builds a filename, `parse_counter(filename)` returns
+    the counter of an existing file of this pattern (or None if it doesn't
+    match), and `start` is the counter used in an empty directory. `key`
+    identifies the pattern within the directory. The returned file exists
+    (empty) on return.
+    """
+    directory = os.path.abspath(directory)
+    cache_key = (directory, key)
+    with _lock:
+        entry = _counters.get(cache_key)
+        if entry is None or entry[1] is None or entry[1] != _dir_mtime(directory):
+            entry = [_scan(directory, parse_counter, start), None]
+
+        counter = entry[0]
+        while True:
+            filename = format_name(counter)
+            try:
+                fd = os.open(os.path.join(directory, filename), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                counter += 1
+                continue
+            os.close(fd)
+            break
+
+        _counters.put(cache_key, [counter + 1, _dir_mtime(directory)])
+        return filename, counter
+
+
+def release_filename(directory, filename):
+    """Remove a reserved file that ended up not being written."""
+    try:
+        path = os.path.join(directory, filename)
+        if os.path.getsize(path) == 0:
+            os.remove(path)
+    except OSError:
+        pass
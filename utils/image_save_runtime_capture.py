@@ -14,42 +14,31 @@ SAMPLER_FIELD_MAP = {
 CLIP_TYPES = {"CLIPTextEncode", "CLIPTextEncodeSDXL", "CLIPTextEncodeFlux"}
 
 
-def _find_sampler_for_save_node(prompt: dict, save_node_id: str):
-    q = deque([str(save_node_id)])
+def _walk_upstream(graph: hook.PromptGraph, start_id: str, class_types: set):
+    """Nearest node of one of class_types at or above start_id (breadth-first)."""
+    q = deque([str(start_id)])
     seen = set()
+    if not any(ct in graph.by_class for ct in class_types):
+        return None
     while q:
         nid = q.popleft()
         if nid in seen:
             continue
         seen.add(nid)
-        node = prompt.get(nid, {})
-        if node.get("class_type", "") in SAMPLER_TYPES:
+        if graph.class_of(nid) in class_types:
             return nid
-        for _, value in node.get("inputs", {}).items():
-            if isinstance(value, list) and len(value) >= 1:
-                parent = str(value[0])
-                if parent not in seen:
-                    q.append(parent)
+        q.extend(p for p in graph.parents.get(nid, ()) if p not in seen)
     return None
 
 
-def _walk_to_clip(start_link, prompt: dict):
+def _find_sampler_for_save_node(graph: hook.PromptGraph, save_node_id: str):
+    return _walk_upstream(graph, save_node_id, SAMPLER_TYPES)
+
+
+def _walk_to_clip(start_link, graph: hook.PromptGraph):
     if not isinstance(start_link, list) or len(start_link) < 1:
         return None
-    q = deque([str(start_link[0])])
-    seen = set()
-    while q:
-        nid = q.popleft()
-        if nid in seen:
-            continue
-        seen.add(nid)
-        node = prompt.get(nid, {})
-        if node.get("class_type", "") in CLIP_TYPES:
-            return nid
-        for _, v in node.get("inputs", {}).items():
-            if isinstance(v, list) and len(v) >= 1:
-                q.append(str(v[0]))
-    return None
+    return _walk_upstream(graph, start_link[0], CLIP_TYPES)
 
 
 def _resolved_inputs(node_id: str):
@@ -98,21 +87,17 @@ def _extract_text_from_clip_node(node_id: str):
     return ""
 
 
-def _collect_loras_from_model_path(start_link, prompt: dict):
+def _collect_loras_from_model_path(start_link, graph: hook.PromptGraph):
     out = []
     seen_names = set()
-    q = deque([start_link] if isinstance(start_link, list) else [])
+    q = deque([str(start_link[0])] if isinstance(start_link, list) and start_link else [])
     seen_nodes = set()
     while q:
-        link = q.popleft()
-        if not isinstance(link, list) or len(link) < 1:
-            continue
-        nid = str(link[0])
+        nid = q.popleft()
         if nid in seen_nodes:
             continue
         seen_nodes.add(nid)
-        node = prompt.get(nid, {})
-        ct = str(node.get("class_type", ""))
+        ct = graph.class_of(nid)
         inp = _resolved_inputs(nid)
 
         lname = inp.get("lora_name")
@@ -140,9 +125,7 @@ def _collect_loras_from_model_path(start_link, prompt: dict):
                         out.append(n)
                         seen_names.add(n)
 
-        for _, v in node.get("inputs", {}).items():
-            if isinstance(v, list) and len(v) >= 1:
-                q.append(v)
+        q.extend(p for p in graph.parents.get(nid, ()) if p not in seen_nodes)
     return out
 
 
@@ -152,11 +135,12 @@ def capture_runtime_prompt_and_loras():
     if not prompt or not save_node_id:
         return None
 
-    sampler_id = _find_sampler_for_save_node(prompt, save_node_id)
+    graph = hook.get_prompt_graph()
+    sampler_id = _find_sampler_for_save_node(graph, save_node_id)
     if not sampler_id:
         return None
 
-    sampler_node = prompt.get(sampler_id, {})
+    sampler_node = graph.node(sampler_id)
     sampler_type = sampler_node.get("class_type", "")
     fmap = SAMPLER_FIELD_MAP.get(sampler_type, {})
     sinputs = sampler_node.get("inputs", {})
@@ -166,20 +150,20 @@ def capture_runtime_prompt_and_loras():
 
     pos_field = fmap.get("positive")
     if pos_field and isinstance(sinputs.get(pos_field), list):
-        clip_id = _walk_to_clip(sinputs.get(pos_field), prompt)
+        clip_id = _walk_to_clip(sinputs.get(pos_field), graph)
         if clip_id:
             pos_text = _extract_text_from_clip_node(clip_id)
 
     neg_field = fmap.get("negative")
     if neg_field and isinstance(sinputs.get(neg_field), list):
-        clip_id = _walk_to_clip(sinputs.get(neg_field), prompt)
+        clip_id = _walk_to_clip(sinputs.get(neg_field), graph)
         if clip_id:
             neg_text = _extract_text_from_clip_node(clip_id)
 
     model_field = fmap.get("model")
     loras = []
     if model_field and isinstance(sinputs.get(model_field), list):
-        loras = _collect_loras_from_model_path(sinputs.get(model_field), prompt)
+        loras = _collect_loras_from_model_path(sinputs.get(model_field), graph)
 
     loras_clean = [os.path.splitext(os.path.basename(x))[0] for x in loras if x]
     loras_clean = list(dict.fromkeys(loras_clean))
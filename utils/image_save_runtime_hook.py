@@ -4,9 +4,42 @@ current_prompt = {}
 current_extra_data = {}
 prompt_executer = None
 current_save_node_id = None
+_current_graph = None
 _installed = False
 
 
+class PromptGraph:
+    """
+    Adjacency index of one API prompt: the ids feeding each node (in input
+    order) and the node ids of each class. Built once per execution so the
+    runtime capture walks don't rescan every node's inputs at each hop.
+    """
+
+    def __init__(self, prompt: dict):
+        self.prompt = prompt
+        self.parents = {}
+        self.by_class = {}
+        for nid, node in prompt.items():
+            nid = str(nid)
+            self.parents[nid] = [str(v[0]) for v in node.get("inputs", {}).values() if isinstance(v, list) and len(v) >= 1]
+            self.by_class.setdefault(str(node.get("class_type", "")), []).append(nid)
+
+    def node(self, node_id: str) -> dict:
+        return self.prompt.get(node_id, {})
+
+    def class_of(self, node_id: str) -> str:
+        return str(self.prompt.get(node_id, {}).get("class_type", ""))
+
+
+def get_prompt_graph():
+    """PromptGraph for the executing prompt, built on first use."""
+    global _current_graph
+    prompt = current_prompt or {}
+    if _current_graph is None or _current_graph.prompt is not prompt:
+        _current_graph = PromptGraph(prompt)
+    return _current_graph
+
+
 def _prefix_function(function, prefunction):
     @functools.wraps(function)
     def run(*args, **kwargs):
@@ -16,10 +49,11 @@ def _prefix_function(function, prefunction):
 
 
 def _pre_execute(self, prompt, prompt_id, extra_data, execute_outputs):
-    global current_prompt, current_extra_data, prompt_executer
+    global current_prompt, current_extra_data, prompt_executer, _current_graph
     current_prompt = prompt
     current_extra_data = extra_data
     prompt_executer = self
+    _current_graph = None
 
 
 def _make_pre_get_input_data(target_class_name: str):
@@ -12,6 +12,14 @@ import piexif.helper
 from PIL.Image import Image
 from PIL.PngImagePlugin import PngInfo
 
+from .metadata_compression import compress_text
+
+# A JPEG APP1 segment holds 65535 bytes including its 2-byte length field.
+MAX_JPEG_EXIF_SIZE = 65533
+# Fixed part of piexif's output: "Exif" and TIFF headers, IFD counts, next-IFD
+# offsets and the Exif IFD pointer, with room to spare.
+EXIF_HEADER_ALLOWANCE = 128
+
 
 def save_image(
     image: Image,
@@ -24,55 +32,84 @@ def save_image(
     prompt: dict[str, Any] | None,
     extra_pnginfo: dict[str, Any] | None,
     embed_workflow: bool,
+    compress_level: int = 6,
+    compress_workflow: bool = False,
 ) -> None:
     if extension == "png":
         metadata = PngInfo()
         if a111_params:
             metadata.add_text("parameters", a111_params)
 
+        def add_json(key: str, value: Any) -> None:
+            text = json.dumps(value, separators=(",", ":"))
+            if compress_workflow:
+                metadata.add_itxt(key, text, zip=True)
+            else:
+                metadata.add_text(key, text)
+
         if embed_workflow:
             if extra_pnginfo is not None:
                 for k, v in extra_pnginfo.items():
-                    metadata.add_text(k, json.dumps(v, separators=(",", ":")))
+                    add_json(k, v)
             if prompt is not None:
-                metadata.add_text("prompt", json.dumps(prompt, separators=(",", ":")))
+                add_json("prompt", prompt)
 
-        image.save(filepath, pnginfo=metadata, optimize=optimize_png)
+        # With optimize on, Pillow always compresses at level 9 and ignores
+        # compress_level, so the level only applies without it.
+        if optimize_png:
+            image.save(filepath, pnginfo=metadata, optimize=True)
+        else:
+            image.save(filepath, pnginfo=metadata, compress_level=compress_level)
     else:
-        image.save(filepath, optimize=True, quality=quality_jpeg_or_webp, lossless=lossless_webp)
+        user_comment = cast(bytes, piexif.helper.UserComment.dump(a111_params, encoding="unicode")) if a111_params else b""
+        def exif_json(value: Any) -> str:
+            text = json.dumps(value, separators=(",", ":"))
+            return compress_text(text) if compress_workflow else text
 
         pnginfo_json = {}
         prompt_json = {}
         if embed_workflow:
             if extra_pnginfo is not None:
-                pnginfo_json = {piexif.ImageIFD.Make - i: f"{k}:{json.dumps(v, separators=(',', ':'))}" for i, (k, v) in enumerate(extra_pnginfo.items())}
+                pnginfo_json = {piexif.ImageIFD.Make - i: f"{k}:{exif_json(v)}" for i, (k, v) in enumerate(extra_pnginfo.items())}
             if prompt is not None:
-                prompt_json = {piexif.ImageIFD.Model: f"prompt:{json.dumps(prompt, separators=(',', ':'))}"}
-
-        def get_exif_bytes() -> bytes:
-            exif_dict = (
-                {"0th": pnginfo_json | prompt_json} if pnginfo_json or prompt_json else {}
-            ) | (
-                {"Exif": {piexif.ExifIFD.UserComment: cast(bytes, piexif.helper.UserComment.dump(a111_params, encoding="unicode"))}}
-                if a111_params
-                else {}
-            )
-            return cast(bytes, piexif.dump(exif_dict))
-
-        exif_bytes = get_exif_bytes()
-
-        if extension in ("jpg", "jpeg"):
-            max_exif_size = 65535
-            if len(exif_bytes) > max_exif_size and embed_workflow:
+                prompt_json = {piexif.ImageIFD.Model: f"prompt:{exif_json(prompt)}"}
+
+        if extension in ("jpg", "jpeg") and embed_workflow:
+            # Trim to the JPEG limit from the payload sizes before building the EXIF,
+            # instead of dumping it again after every removal.
+            size = _estimate_exif_size(user_comment, pnginfo_json, prompt_json)
+            if size > MAX_JPEG_EXIF_SIZE and prompt_json:
                 print("ComfyUI-Image-Saver: Error: Workflow is too large, removing client request prompt.")
                 prompt_json = {}
-                exif_bytes = get_exif_bytes()
-                if len(exif_bytes) > max_exif_size:
-                    print("ComfyUI-Image-Saver: Error: Workflow is still too large, cannot embed workflow!")
-                    pnginfo_json = {}
-                    exif_bytes = get_exif_bytes()
-            if len(exif_bytes) > max_exif_size:
-                print("ComfyUI-Image-Saver: Error: Metadata exceeds maximum size for JPEG. Cannot save metadata.")
-                return
-
-        piexif.insert(exif_bytes, filepath)
+                size = _estimate_exif_size(user_comment, pnginfo_json, prompt_json)
+            if size > MAX_JPEG_EXIF_SIZE and pnginfo_json:
+                print("ComfyUI-Image-Saver: Error: Workflow is still too large, cannot embed workflow!")
+                pnginfo_json = {}
+
+        exif_dict = (
+            {"0th": pnginfo_json | prompt_json} if pnginfo_json or prompt_json else {}
+        ) | (
+            {"Exif": {piexif.ExifIFD.UserComment: user_comment}} if user_comment else {}
+        )
+        exif_bytes = cast(bytes, piexif.dump(exif_dict))
+
+        if extension in ("jpg", "jpeg") and len(exif_bytes) > MAX_JPEG_EXIF_SIZE:
+            print("ComfyUI-Image-Saver: Error: Metadata exceeds maximum size for JPEG. Cannot save metadata.")
+            exif_bytes = b""
+
+        # The EXIF goes in with the encode, so the file is written once.
+        image.save(filepath, optimize=True, quality=quality_jpeg_or_webp, lossless=lossless_webp, exif=exif_bytes)
+
+
+def _estimate_exif_size(user_comment: bytes, *ifd_entries: dict[int, str]) -> int:
+    """
+    Upper bound on the size piexif.dump gives for these entries: the headers,
+    a 12-byte IFD entry per tag, and each value with its terminator and padding.
+    """
+    size = EXIF_HEADER_ALLOWANCE
+    if user_comment:
+        size += 12 + len(user_comment) + 1
+    for entries in ifd_entries:
+        for value in entries.values():
+            size += 12 + len(value.encode("utf-8")) + 2
+    return size
@@ -6,6 +6,7 @@ Adapted into ComfyUI-mnemic-nodes for the "Image Save With Metadata" node.
 
 import os
 import re
+import threading
 from pathlib import Path
 from typing import Any, Optional
 from collections.abc import Collection, Iterator
@@ -55,23 +56,92 @@ def full_checkpoint_path_for(model_name: str) -> str:
     return ""
 
 
-def get_file_path_iterator(folder_name: str, supported_extensions: Optional[Collection[str]] = None) -> Iterator[Path]:
-    if supported_extensions is None:
-        return (Path(x) for x in folder_paths.get_filename_list(folder_name))
-    return custom_file_path_generator(folder_name, supported_extensions)
-
-
-def custom_file_path_generator(folder_name: str, supported_extensions: Collection[str]) -> Iterator[Path]:
+class _FolderIndex:
+    """Model files of one folder, looked up by relative path, path without extension, stem or name."""
+
+    def __init__(self, paths: list[Path], dir_mtimes: Optional[dict[str, int]] = None, list_key: Optional[int] = None):
+        self.paths = paths
+        self.dir_mtimes = dir_mtimes
+        self.list_key = list_key
+        self.by_path: dict[Path, Path] = {}
+        self.by_path_without_suffix: dict[Path, Path] = {}
+        self.by_stem: dict[str, Path] = {}
+        self.by_name: dict[str, Path] = {}
+        # setdefault keeps the first file in listing order, as the linear scans did.
+        for p in paths:
+            self.by_path.setdefault(p, p)
+            self.by_path_without_suffix.setdefault(p.with_suffix(""), p)
+            self.by_stem.setdefault(p.stem, p)
+            self.by_name.setdefault(p.name, p)
+
+    def is_fresh(self) -> bool:
+        """True while every walked directory still has its recorded mtime."""
+        for directory, mtime in (self.dir_mtimes or {}).items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+
+_folder_indexes: dict[tuple, _FolderIndex] = {}
+_folder_indexes_lock = threading.Lock()
+
+
+def _scan_model_folder(folder_name: str, supported_extensions: Collection[str]) -> _FolderIndex:
+    paths = []
+    dir_mtimes = {}
     model_paths = folder_paths.folder_names_and_paths.get(folder_name, [[], set()])[0]
     for path in model_paths:
         if os.path.exists(path):
             base_path = Path(path)
             for root, _, files in os.walk(path):
+                try:
+                    dir_mtimes[root] = os.stat(root).st_mtime_ns
+                except OSError:
+                    pass
                 root_path = Path(root).relative_to(base_path)
                 for file in files:
                     file_path = root_path / file
                     if file_path.suffix.lower() in supported_extensions:
-                        yield file_path
+                        paths.append(file_path)
+    return _FolderIndex(paths, dir_mtimes=dir_mtimes)
+
+
+def get_folder_index(folder_name: str, supported_extensions: Optional[Collection[str]] = None) -> _FolderIndex:
+    """
+    Cached index of a model folder. Folders listed through ComfyUI are rebuilt
+    when the file list changes; walked folders are rebuilt when the mtime of
+    any walked directory changes (a file was added, removed or renamed).
+    """
+    if supported_extensions is None:
+        file_list = folder_paths.get_filename_list(folder_name)
+        key = (folder_name, None)
+        list_key = hash(tuple(file_list))
+        with _folder_indexes_lock:
+            index = _folder_indexes.get(key)
+            if index is None or index.list_key != list_key:
+                index = _FolderIndex([Path(x) for x in file_list], list_key=list_key)
+                _folder_indexes[key] = index
+            return index
+
+    model_paths = folder_paths.folder_names_and_paths.get(folder_name, [[], set()])[0]
+    key = (folder_name, frozenset(supported_extensions), tuple(model_paths))
+    with _folder_indexes_lock:
+        index = _folder_indexes.get(key)
+        if index is None or not index.is_fresh():
+            index = _scan_model_folder(folder_name, supported_extensions)
+            _folder_indexes[key] = index
+        return index
+
+
+def get_file_path_iterator(folder_name: str, supported_extensions: Optional[Collection[str]] = None) -> Iterator[Path]:
+    return iter(get_folder_index(folder_name, supported_extensions).paths)
+
+
+def custom_file_path_generator(folder_name: str, supported_extensions: Collection[str]) -> Iterator[Path]:
+    yield from get_folder_index(folder_name, supported_extensions).paths
 
 
 def get_file_path_match(
@@ -83,33 +153,16 @@ def get_file_path_match(
         supported_extensions if supported_extensions is not None else folder_paths.supported_pt_extensions
     )
     file_path = Path(file_name)
+    index = get_folder_index(folder_name, supported_extensions)
 
     if file_path.suffix.lower() not in supported_extensions_fallback:
-        matching_file_path = next(
-            (p for p in get_file_path_iterator(folder_name, supported_extensions) if p.with_suffix("") == file_path),
-            None,
-        )
-        matching_file_path = (
-            matching_file_path
-            if matching_file_path is not None
-            else next(
-                (p for p in get_file_path_iterator(folder_name, supported_extensions) if p.stem == file_path.name),
-                None,
-            )
-        )
+        matching_file_path = index.by_path_without_suffix.get(file_path)
+        if matching_file_path is None:
+            matching_file_path = index.by_stem.get(file_path.name)
     else:
-        matching_file_path = next(
-            (p for p in get_file_path_iterator(folder_name, supported_extensions) if p == file_path),
-            None,
-        )
-        matching_file_path = (
-            matching_file_path
-            if matching_file_path is not None
-            else next(
-                (p for p in get_file_path_iterator(folder_name, supported_extensions) if p.name == file_path.name),
-                None,
-            )
-        )
+        matching_file_path = index.by_path.get(file_path)
+        if matching_file_path is None:
+            matching_file_path = index.by_name.get(file_path.name)
 
     return str(matching_file_path) if matching_file_path is not None else None
 
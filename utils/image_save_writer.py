@@ -0,0 +1,102 @@
+"""
+Image encoding pool for the Save Image With Metadata node.
+
+Encoding a PNG/JPEG/WebP and writing it to disk takes a noticeable share of a
+save, and batches used to encode one image after another on the execution
+thread. The node now only converts each image to a uint8 buffer and builds
+its metadata, then hands both to this writer, whose worker threads encode
+several images at once (PIL releases the GIL while compressing). The number
+of workers is the Image Saving "Encoding threads" setting.
+
+A normal save waits for its own images before returning. With background
+saving enabled the node returns right away and the files are written while
+the queue moves on:
+
+- Back-pressure: at most MAX_PENDING_IMAGES images wait in the queue. When it
+  is full, submitting blocks until a worker has taken one, so a fast workflow
+  can't pile up unbounded image buffers in memory.
+- Shutdown: pending images are flushed to disk when ComfyUI exits.
+- Errors: a failed background write can't be raised from the node that
+  submitted it (that execution has already finished), so failures are
+  collected and reported by the next save.
+"""
+
+import atexit
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+MAX_PENDING_IMAGES = 16
+
+
+def default_worker_count():
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+class BackgroundImageWriter:
+    """Bounded job queue drained by a resizable set of daemon worker threads."""
+
+    def __init__(self, max_pending=MAX_PENDING_IMAGES):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._errors = []
+        self._lock = threading.Lock()
+        self._workers = 1
+        self._alive = 0
+
+    def set_workers(self, count):
+        """Run `count` worker threads; extra threads exit after their current job."""
+        with self._lock:
+            self._workers = max(1, int(count))
+            while self._alive < self._workers:
+                self._alive += 1
+                threading.Thread(target=self._run, name="mnemic-image-writer", daemon=True).start()
+
+    def submit(self, job, describe="", report=False):
+        """
+        Queue job() on the workers, blocking while the queue is full. Returns a
+        Future for the job's result. With `report`, a failure is also kept for
+        take_errors(), for callers that won't wait on the Future.
+        """
+        if self._alive == 0:
+            self.set_workers(self._workers)
+        future = Future()
+        self._queue.put((job, describe, report, future))
+        return future
+
+    def flush(self):
+        """Block until every queued image has been written."""
+        self._queue.join()
+
+    def take_errors(self):
+        """Errors from earlier background writes, cleared once taken."""
+        with self._lock:
+            errors, self._errors = self._errors, []
+        return errors
+
+    def _run(self):
+        while True:
+            job, describe, report, future = self._queue.get()
+            try:
+                future.set_result(job())
+            except Exception as e:
+                future.set_exception(e)
+                if report:
+                    with self._lock:
+                        self._errors.append(f"{describe}: {e}" if describe else str(e))
+            finally:
+                self._queue.task_done()
+            with self._lock:
+                if self._alive > self._workers:
+                    self._alive -= 1
+                    return
+
+
+_writer = BackgroundImageWriter()
+atexit.register(_writer.flush)
+
+
+def get_image_writer(workers=0):
+    """The shared writer, sized to `workers` threads (0 picks one per core, up to 8)."""
+    _writer.set_workers(workers if workers > 0 else default_worker_count())
+    return _writer
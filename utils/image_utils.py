@@ -15,17 +15,26 @@ def encode_image(image_pil):
         print(f"Error encoding image: {e}")
         return None
 
-def tensor_to_pil(image_tensor):
+def tensor_to_uint8(images):
+    """
+    Convert a float image tensor in [0, 1] ([H, W, C] or a [B, H, W, C] batch)
+    to a uint8 numpy array in one pass. Scaling, clamping and the cast run on
+    the tensor's device, so only the uint8 data is copied to the CPU; index the
+    result per image to get zero-copy views for Image.fromarray.
+    """
     import torch
+    with torch.no_grad():
+        pixels = images.detach().mul(255.0).clamp_(0, 255).to(torch.uint8)
+    return pixels.cpu().numpy()
+
+def tensor_to_pil(image_tensor):
     # Remove batch dimension if it exists (tensor shape [1, H, W, C])
     if image_tensor.ndim == 4 and image_tensor.shape[0] == 1:
         image_tensor = image_tensor.squeeze(0)  # Remove the batch dimension
 
     # Ensure the tensor is in the form [H, W, C] (height, width, channels)
     if image_tensor.ndim == 3 and image_tensor.shape[2] == 3:  # Expecting RGB image with 3 channels
-        image_array = image_tensor.cpu().numpy()
-        image_array = (image_array * 255).astype(np.uint8)  # Convert from [0, 1] to [0, 255]
-        return Image.fromarray(image_array)
+        return Image.fromarray(tensor_to_uint8(image_tensor))  # Convert from [0, 1] to [0, 255]
     else:
         raise TypeError(f"Unsupported image tensor shape: {image_tensor.shape}")
 
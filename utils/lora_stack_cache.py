@@ -0,0 +1,259 @@
+"""
+Fused LoRA stack cache for the LoRA Loader Prompt Tags node.
+
+Prompts that reuse the same combination of LoRAs and strengths pay for
+comfy.sd.load_lora_for_models on every run: each LoRA file is read, its keys
+are mapped onto the model and one patch per LoRA is added to every weight it
+touches. With the fused stack cache enabled, the first run of a stack merges
+the patches of all its LoRAs into one low-rank patch per weight and saves
+them to a safetensors file keyed by the stack signature. Later runs apply that
+single patch set instead of loading and patching each LoRA.
+
+The merge is exact for plain LoRA: the sum of s_i * (alpha_i / rank_i) * up_i
+@ down_i is [up_1 .. up_n] @ [down_1; ..; down_n] with each column of up
+scaled by its LoRA's factor. The up/down factors are stored as they were
+loaded, next to a float32 scale per rank, so a cached stack is the size of its
+LoRAs and gives the same images as the first run.
+
+Only plain LoRA patches (no DoRA, Tucker mid weight or reshape) are fused.
+Stacks containing any other patch type (LoHa, LoKr, OFT, BOFT, GLoRA, full
+diffs, ...) are never fused and always take the normal path.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import torch
+
+import comfy.utils
+
+try:
+    from comfy.weight_adapter import LoRAAdapter
+except ImportError:  # Older ComfyUI stores LoRA patches as ("lora", weights) tuples.
+    LoRAAdapter = None
+
+from .cache_utils import file_signature, get_cache_directory
+
+# Fused stacks are about the size of their LoRA files, but are applied to
+# every weight they touch, so only a couple are kept in RAM. Everything else
+# is re-read from the disk cache.
+MAX_IN_MEMORY_STACKS = 2
+
+# Part of every stack signature; bumped when the stored format changes so
+# files written by older versions are never applied.
+FUSED_FORMAT_VERSION = 3
+
+_MODEL_PREFIX = "model/"
+_CLIP_PREFIX = "clip/"
+
+_lock = threading.Lock()
+_memory_cache = OrderedDict()
+
+
+def stack_signature(model, clip, stack):
+    """
+    Identify a LoRA stack. `stack` is a list of (lora_path, model_strength,
+    clip_strength) in application order. The model/CLIP classes are part of
+    the key because the same LoRA maps onto different weights per architecture.
+    """
+    parts = [
+        FUSED_FORMAT_VERSION,
+        type(getattr(model, "model", model)).__name__,
+        type(getattr(clip, "cond_stage_model", clip)).__name__,
+    ]
+    for lora_path, strength_model, strength_clip in stack:
+        parts.append([file_signature(lora_path), float(strength_model), float(strength_clip)])
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+def _cache_path(signature):
+    return os.path.join(get_cache_directory("fused_loras"), f"{signature[:32]}.safetensors")
+
+
+def _lora_factors(patch):
+    """
+    (up, down, scale) of a plain LoRA patch entry, or None for any other
+    patch. `scale` folds the patch strength and alpha / rank together.
+    """
+    strength_patch, value = patch[0], patch[1]
+    strength_model = patch[2] if len(patch) > 2 else 1.0
+    function = patch[4] if len(patch) > 4 else None
+    if strength_model != 1.0 or function is not None:
+        return None
+    if LoRAAdapter is not None and isinstance(value, LoRAAdapter):
+        weights = value.weights
+    elif isinstance(value, tuple) and len(value) == 2 and value[0] == "lora":
+        weights = value[1]
+    else:
+        return None
+    up, down, alpha = weights[0], weights[1], weights[2]
+    if any(extra is not None for extra in weights[3:]):
+        return None  # Tucker mid weight, DoRA scale or reshape.
+    rank = down.shape[0]
+    scale = float(strength_patch) * (float(alpha) / rank if alpha is not None else 1.0)
+    return up, down, scale
+
+
+def _fuse_patcher(base_patcher, patched_patcher):
+    """
+    Merge the LoRA patches added on top of `base_patcher` into one low-rank
+    patch per (key, offset): the up factors concatenated along the rank, the
+    down factors stacked along it, and one scale per rank. Returns None when
+    a patch isn't a plain LoRA.
+    """
+    base_patches = getattr(base_patcher, "patches", {})
+    fused = {}
+    for key, patch_list in patched_patcher.patches.items():
+        groups = {}
+        for patch in patch_list[len(base_patches.get(key, [])):]:
+            factors = _lora_factors(patch)
+            if factors is None:
+                return None
+            offset = patch[3] if len(patch) > 3 else None
+            groups.setdefault(offset, []).append(factors)
+        for offset, factors in groups.items():
+            ups = [up for up, _, _ in factors]
+            downs = [down for _, down, _ in factors]
+            if (len({(up.shape[0],) + tuple(up.shape[2:]) for up in ups}) > 1
+                    or len({tuple(down.shape[1:]) for down in downs}) > 1):
+                return None
+            dtype = ups[0].dtype if all(t.dtype == ups[0].dtype for t in ups + downs) else torch.float32
+            scale = torch.cat([
+                torch.full((down.shape[0],), s, dtype=torch.float32) for _, down, s in factors
+            ])
+            fused[key if offset is None else (key, tuple(offset))] = (
+                torch.cat([up.to(dtype) for up in ups], dim=1).contiguous(),
+                torch.cat([down.to(dtype) for down in downs], dim=0).contiguous(),
+                scale,
+            )
+    return fused
+
+
+def build_fused_stack(base_model, base_clip, patched_model, patched_clip):
+    """
+    Return (model_patches, clip_patches) for a stack already applied the
+    normal way, or None when it contains patches that can't be fused.
+    """
+    model_patches = _fuse_patcher(base_model, patched_model)
+    if model_patches is None:
+        return None
+    clip_patches = {}
+    if base_clip is not None and patched_clip is not None:
+        clip_patches = _fuse_patcher(base_clip.patcher, patched_clip.patcher)
+        if clip_patches is None:
+            return None
+    return model_patches, clip_patches
+
+
+def _tensor_name(prefix, patch_key, part):
+    if isinstance(patch_key, tuple):
+        key, offset = patch_key
+        return f"{prefix}{key}@{','.join(str(int(o)) for o in offset)}/{part}"
+    return f"{prefix}{patch_key}/{part}"
+
+
+def _parse_tensor_names(sd, prefix):
+    patches = {}
+    for name, tensor in sd.items():
+        if not name.startswith(prefix):
+            continue
+        key, _, part = name[len(prefix):].rpartition("/")
+        key, at, offset = key.rpartition("@") if "@" in key else (key, "", "")
+        patch_key = (key, tuple(int(o) for o in offset.split(","))) if at else key
+        patches.setdefault(patch_key, {})[part] = tensor
+    return {k: (v["up"], v["down"], v["scale"]) for k, v in patches.items()}
+
+
+def _remember(signature, fused):
+    with _lock:
+        _memory_cache[signature] = fused
+        _memory_cache.move_to_end(signature)
+        while len(_memory_cache) > MAX_IN_MEMORY_STACKS:
+            _memory_cache.popitem(last=False)
+
+
+def save_fused_stack(signature, fused, stack):
+    """Persist a fused stack. The file is written to a temp name and swapped in."""
+    sd = {}
+    for prefix, patches in zip((_MODEL_PREFIX, _CLIP_PREFIX), fused):
+        for patch_key, factors in patches.items():
+            for part, tensor in zip(("up", "down", "scale"), factors):
+                sd[_tensor_name(prefix, patch_key, part)] = tensor
+    metadata = {
+        "mnemic_fused_lora_stack": json.dumps(
+            [[os.path.basename(p), float(sm), float(sc)] for p, sm, sc in stack]
+        ),
+    }
+    path = _cache_path(signature)
+    tmp_path = path + ".tmp"
+    try:
+        comfy.utils.save_torch_file(sd, tmp_path, metadata=metadata)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"LoraTagLoader Warning: Could not write fused LoRA stack cache '{path}': {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    _remember(signature, fused)
+
+
+def fused_stack_read_bytes(signature):
+    """
+    Bytes a cached stack reads from disk when applied: 0 while it is held in
+    memory, its file size when only on disk, or None when it isn't cached.
+    """
+    with _lock:
+        if signature in _memory_cache:
+            return 0
+    try:
+        return os.path.getsize(_cache_path(signature))
+    except OSError:
+        return None
+
+
+def load_fused_stack(signature):
+    """Return (model_patches, clip_patches) for a known stack, or None."""
+    with _lock:
+        fused = _memory_cache.get(signature)
+        if fused is not None:
+            _memory_cache.move_to_end(signature)
+            return fused
+
+    path = _cache_path(signature)
+    if not os.path.exists(path):
+        return None
+    try:
+        sd = comfy.utils.load_torch_file(path, safe_load=True)
+    except Exception as e:
+        print(f"LoraTagLoader Warning: Ignoring unreadable fused LoRA stack cache '{path}': {e}")
+        return None
+
+    fused = (_parse_tensor_names(sd, _MODEL_PREFIX), _parse_tensor_names(sd, _CLIP_PREFIX))
+    _remember(signature, fused)
+    return fused
+
+
+def _lora_patches(patches):
+    """Turn stored (up, down, scale) factors into one LoRA patch per key."""
+    result = {}
+    for patch_key, (up, down, scale) in patches.items():
+        up = up.to(torch.float32) * scale.view((1, -1) + (1,) * (up.ndim - 2))
+        weights = (up, down, None, None, None, None)
+        result[patch_key] = LoRAAdapter(set(), weights) if LoRAAdapter is not None else ("lora", weights)
+    return result
+
+
+def apply_fused_stack(model, clip, fused):
+    """Apply a fused stack as one LoRA patch per weight on clones of model/clip."""
+    model_patches, clip_patches = fused
+    new_model = model.clone()
+    new_model.add_patches(_lora_patches(model_patches), 1.0)
+    new_clip = clip
+    if clip is not None and clip_patches:
+        new_clip = clip.clone()
+        new_clip.add_patches(_lora_patches(clip_patches), 1.0)
+    return new_model, new_clip
@@ -0,0 +1,47 @@
+"""
+Compressed workflow embedding for saved images.
+
+Workflow JSON compresses very well (often 10x or more). With compression on,
+Save Image With Metadata stores the workflow and prompt:
+
+- PNG: as compressed iTXt chunks. PIL decompresses these by itself, so
+  img.info holds the plain JSON as before.
+- JPEG/WebP: in the usual EXIF text tags ("workflow:..." / "prompt:..."), with
+  the JSON replaced by COMPRESSED_PREFIX + base64(zlib(json)). This keeps large
+  workflows under the 64 KB JPEG EXIF limit. decompress_exif_value() turns
+  such a value back into "key:json".
+
+The A1111 "parameters" text is never compressed, so Civitai and other readers
+still see it.
+"""
+
+import base64
+import binascii
+import zlib
+
+COMPRESSED_PREFIX = "zlib+b64:"
+
+
+def compress_text(text: str) -> str:
+    """COMPRESSED_PREFIX + base64 of the zlib-compressed UTF-8 text."""
+    return COMPRESSED_PREFIX + base64.b64encode(zlib.compress(text.encode("utf-8"), 9)).decode("ascii")
+
+
+def decompress_text(value: str) -> str:
+    """Reverse of compress_text; values without the prefix are returned unchanged."""
+    if not isinstance(value, str) or not value.startswith(COMPRESSED_PREFIX):
+        return value
+    try:
+        return zlib.decompress(base64.b64decode(value[len(COMPRESSED_PREFIX):])).decode("utf-8")
+    except (binascii.Error, zlib.error, UnicodeDecodeError):
+        return value
+
+
+def decompress_exif_value(value: str) -> str:
+    """Decode a "key:<compressed>" EXIF text value into "key:json"."""
+    if not isinstance(value, str):
+        return value
+    key, sep, rest = value.partition(":")
+    if sep and rest.startswith(COMPRESSED_PREFIX):
+        return f"{key}:{decompress_text(rest)}"
+    return decompress_text(value)
@@ -8,6 +8,8 @@ from PIL import Image
 import torchvision.transforms.functional as F
 from typing import Dict, Any
 
+from .metadata_compression import decompress_text, decompress_exif_value
+
 def _parse_png_parameters(metadata: Dict[str, Any]) -> Dict[str, Any]:
     """Helper function to parse parameters from PNG metadata."""
     parsed_data = {"positive_prompt": "", "negative_prompt": "", "parsed_params": {}}
@@ -52,7 +54,7 @@ def extract_metadata_from_file(file_path: str) -> Dict[str, Any]:
     ext = os.path.splitext(file_path)[1].lower()
     try:
         if ext == '.png':
-            with Image.open(file_path) as img: info = dict(img.info)
+            with Image.open(file_path) as img: info = {k: decompress_text(v) for k, v in img.info.items()}
             metadata = {"file_path": file_path, "metadata": info}
             return _parse_png_parameters(metadata)
         else:
@@ -63,7 +65,7 @@ def extract_metadata_from_file(file_path: str) -> Dict[str, Any]:
                 readable_exif[ifd] = {}
                 for tag, value in tags.items():
                     tag_name = piexif.TAGS.get(ifd, {}).get(tag, {}).get("name", tag)
-                    try: readable_exif[ifd][tag_name] = value.decode('utf-8', 'ignore') if isinstance(value, bytes) else value
+                    try: readable_exif[ifd][tag_name] = decompress_exif_value(value.decode('utf-8', 'ignore')) if isinstance(value, bytes) else value
                     except: readable_exif[ifd][tag_name] = repr(value)
             return {"file_path": file_path, "metadata": readable_exif, "parsed_params": {}, "positive_prompt": "", "negative_prompt": ""}
     except Exception as e:
@@ -0,0 +1,156 @@
+"""
+Model file hashes for Civitai-compatible metadata.
+
+Civitai links the resources of an image by the short hashes A1111 writes:
+
+- Checkpoints ("Model hash"): AutoV2, the first 10 hex digits of the file's
+  SHA256.
+- LoRAs ("Lora hashes"): AutoV3, the first 12 hex digits of the SHA256 of a
+  safetensors file's tensor data, i.e. everything after the header. Other
+  LoRA files use the whole file, as A1111 does.
+
+Hashing a multi-GB model takes seconds, so it never happens during a save:
+
+- Known hashes are kept in memory and persisted to
+  <ComfyUI user directory>/mnemic_cache/model_hashes, keyed by file path
+  together with its size and mtime, so a replaced file is hashed again.
+- A file without a hash is queued for a background thread, which reads it in
+  memory-mapped chunks. The save goes ahead without that hash (the field is
+  left out of the metadata, which Civitai treats as an unknown resource), and
+  saves made after the hash is ready include it.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import queue
+import threading
+
+from .cache_utils import file_signature, get_cache_directory
+
+CACHE_VERSION = 2
+CHUNK_SIZE = 16 * 1024 * 1024
+
+_lock = threading.Lock()
+_hashes = None  # path -> {"size", "mtime", "sha256", "tensor_sha256"} (hashes computed so far)
+_pending = set()
+_queue = queue.Queue()
+_worker = None
+
+
+def _cache_path():
+    return os.path.join(get_cache_directory("model_hashes"), "hashes.json")
+
+
+def _load_locked():
+    global _hashes
+    if _hashes is not None:
+        return
+    _hashes = {}
+    try:
+        with open(_cache_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == CACHE_VERSION:
+            _hashes = data.get("files", {})
+    except (OSError, ValueError):
+        pass
+
+
+def _save():
+    with _lock:
+        data = {"version": CACHE_VERSION, "files": dict(_hashes)}
+    path = _cache_path()
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"ImageSaveWithMetadata Warning: Could not write model hash cache '{path}': {e}")
+
+
+def _safetensors_data_offset(f, size):
+    """Offset of the tensor data in a safetensors file: 8-byte length + header."""
+    header = f.read(8)
+    if len(header) < 8:
+        return 0
+    return min(size, 8 + int.from_bytes(header, "little"))
+
+
+def sha256_file(path, tensor_data_only=False):
+    """
+    SHA256 of a file, read through a memory map in CHUNK_SIZE pieces. With
+    `tensor_data_only`, a safetensors file is hashed from the end of its
+    header (A1111's AutoV3 / "addnet" hash).
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        start = _safetensors_data_offset(f, size) if tensor_data_only and path.endswith(".safetensors") else 0
+        if size <= start:
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                for offset in range(start, len(mm), CHUNK_SIZE):
+                    digest.update(view[offset:offset + CHUNK_SIZE])
+            finally:
+                view.release()
+    return digest.hexdigest()
+
+
+def _run():
+    while True:
+        signature, kind = _queue.get()
+        path, size, mtime = signature
+        try:
+            digest = sha256_file(path, tensor_data_only=(kind == "tensor_sha256"))
+        except (OSError, ValueError) as e:
+            print(f"ImageSaveWithMetadata Warning: Could not hash '{path}': {e}")
+            digest = None
+        with _lock:
+            _pending.discard((path, kind))
+            if digest is not None and file_signature(path) == signature:
+                entry = _hashes.get(path)
+                if entry is None or entry.get("size") != size or entry.get("mtime") != mtime:
+                    entry = _hashes[path] = {"size": size, "mtime": mtime}
+                entry[kind] = digest
+        if digest is not None:
+            _save()
+
+
+def _get_hash(path, kind, length):
+    global _worker
+    signature = file_signature(path) if path else None
+    if signature is None:
+        return None
+    abspath, size, mtime = signature
+    with _lock:
+        _load_locked()
+        entry = _hashes.get(abspath)
+        if entry is not None and entry.get("size") == size and entry.get("mtime") == mtime and kind in entry:
+            return entry[kind][:length]
+        if (abspath, kind) not in _pending:
+            _pending.add((abspath, kind))
+            _queue.put((signature, kind))
+            if _worker is None or not _worker.is_alive():
+                _worker = threading.Thread(target=_run, name="mnemic-model-hash", daemon=True)
+                _worker.start()
+    return None
+
+
+def get_autov2_hash(path):
+    """
+    AutoV2 hash (checkpoint "Model hash") of a model file, or None while it is
+    not known yet. Unknown files are queued for background hashing.
+    """
+    return _get_hash(path, "sha256", 10)
+
+
+def get_autov3_hash(path):
+    """
+    AutoV3 hash (the "Lora hashes" entry) of a LoRA file, or None while it is
+    not known yet. Unknown files are queued for background hashing.
+    """
+    return _get_hash(path, "tensor_sha256", 12)
@@ -0,0 +1,193 @@
+"""
+Cache of loaded checkpoints, CLIPs and VAEs shared by the model-loading nodes.
+
+comfy.sd.load_checkpoint_guess_config, comfy.sd.load_clip and comfy.sd.VAE
+read and build multi-GB files from disk on every call. Nodes that load the
+same file again (Load Random Checkpoint repeats, Prompt Property Extractor
+prompts reusing a <checkpoint:>, <clip:> or <vae:> tag) get the already-loaded
+objects back instead.
+
+Entries are keyed by kind plus the path, size and mtime of their files, so an
+overwritten file is loaded fresh. The cache is an LRU with a memory budget
+(the Model Loading cache setting, in GB) where each entry counts as its file
+size; 0 disables it.
+
+Each node instance holds a ModelCacheLease on the entries it returned last.
+Held entries are never evicted, so one node loading a new model can't drop
+the model another node is still using; once a node moves on to different
+files, its old entries are released and become evictable again.
+"""
+
+import threading
+from collections import OrderedDict
+
+import comfy.sd
+import comfy.utils
+import folder_paths
+
+from .cache_utils import LRUCache, file_signature
+from .file_utils import find_best_match
+
+GB = 1024 ** 3
+
+
+class ModelCache:
+    """LRU of loaded models with a byte budget and per-entry reference counts."""
+
+    def __init__(self):
+        self.max_bytes = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> [value, size, refs]
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, size):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = [value, size, old[2] if old is not None else 0]
+            self.total_bytes += size
+            self._evict_locked()
+
+    def acquire(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[2] += 1
+
+    def release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > 0:
+                entry[2] -= 1
+            self._evict_locked()
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict_locked()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _evict_locked(self):
+        for key in list(self._entries):
+            if self.total_bytes <= self.max_bytes:
+                break
+            entry = self._entries[key]
+            if entry[2] > 0:
+                continue  # Held by a node, never evicted.
+            del self._entries[key]
+            self.total_bytes -= entry[1]
+
+
+_models = ModelCache()
+
+
+class ModelCacheLease:
+    """
+    The cache entries one node instance is using. Wrap each execution in
+    `with lease:`; entries loaded during it stay held until a later execution
+    no longer uses them.
+    """
+
+    def __init__(self):
+        self._held = set()
+        self._used = None
+
+    def __enter__(self):
+        self._used = set()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        used, self._used = self._used, None
+        for key in used - self._held:
+            _models.acquire(key)
+        for key in self._held - used:
+            _models.release(key)
+        self._held = used
+        return False
+
+    def use(self, key):
+        if self._used is not None:
+            self._used.add(key)
+
+
+def _cached_load(kind, paths, budget_gb, load, lease=None, console_log=False):
+    """Return load() for `paths`, from the cache when the files are unchanged."""
+    _models.set_max_bytes(int(max(0, budget_gb) * GB))
+
+    signatures = tuple(file_signature(p) for p in paths)
+    if any(s is None for s in signatures):
+        return load()
+    key = (kind, signatures)
+
+    value = _models.get(key)
+    if value is not None:
+        if console_log:
+            print(f"Model cache > HIT: Reusing the loaded {kind}.")
+    else:
+        value = load()
+        if budget_gb > 0:
+            _models.put(key, value, sum(s[1] for s in signatures))
+            if console_log:
+                print(f"Model cache > Stored {kind} ({len(_models)} cached, "
+                      f"{_models.total_bytes / GB:.1f}/{budget_gb} GB).")
+    if lease is not None:
+        lease.use(key)
+    return value
+
+
+def load_checkpoint(path, budget_gb, console_log=False, lease=None):
+    """Return (model, clip, vae) for a checkpoint, from the cache when possible."""
+    def load():
+        model, clip, vae, _ = comfy.sd.load_checkpoint_guess_config(
+            path,
+            output_vae=True,
+            output_clip=True,
+            embedding_directory=folder_paths.get_folder_paths("embeddings")
+        )
+        return (model, clip, vae)
+
+    return _cached_load("checkpoint", [path], budget_gb, load, lease=lease, console_log=console_log)
+
+
+def load_clip(path, budget_gb, console_log=False, lease=None):
+    """Return a CLIP loaded from a standalone text encoder file."""
+    return _cached_load("clip", [path], budget_gb, lambda: comfy.sd.load_clip(ckpt_paths=[path]),
+                        lease=lease, console_log=console_log)
+
+
+def load_vae(path, budget_gb, console_log=False, lease=None):
+    """Return a VAE loaded from a standalone VAE file."""
+    return _cached_load("vae", [path], budget_gb, lambda: comfy.sd.VAE(sd=comfy.utils.load_torch_file(path)),
+                        lease=lease, console_log=console_log)
+
+
+_matches = LRUCache(max_items=256)
+
+
+def find_model_file(folder_name, name, fuzzy_search=False):
+    """
+    Full path of the file in a model folder best matching `name`, or None.
+    Matching scores every file in the folder, so results are remembered for
+    as long as the folder's file list is unchanged.
+    """
+    file_list = folder_paths.get_filename_list(folder_name)
+    key = (folder_name, name, bool(fuzzy_search), hash(tuple(file_list)))
+    filename = _matches.get(key)
+    if filename is None:
+        filename = find_best_match(name, file_list, log=False, fuzzy_search=fuzzy_search) or ""
+        _matches.put(key, filename)
+    return folder_paths.get_full_path(folder_name, filename) if filename else None
@@ -6,6 +6,7 @@ import folder_paths
 LORA_FUZZY_SEARCH_SETTING_ID = "MNeMiC.LoRALoading.FuzzySearch"
 LORA_CONSOLE_LOG_SETTING_ID = "MNeMiC.LoRALoading.ConsoleLogging"
 LORA_MAX_LOGGED_CANDIDATES_SETTING_ID = "MNeMiC.LoRALoading.MaxLoggedCandidates"
+LORA_FUSED_STACK_CACHE_SETTING_ID = "MNeMiC.LoRALoading.FusedStackCache"
 
 WILDCARD_FUZZY_SEARCH_SETTING_ID = "MNeMiC.WildcardProcessing.FuzzySearch"
 WILDCARD_CONSOLE_LOG_SETTING_ID = "MNeMiC.WildcardProcessing.ConsoleLogging"
@@ -29,6 +30,12 @@ PROMPT_PROPERTY_EXTRACTOR_CONSOLE_LOG_SETTING_ID = "MNeMiC.PromptPropertyExtract
 
 LOAD_RANDOM_CHECKPOINT_CONSOLE_LOG_SETTING_ID = "MNeMiC.LoadRandomCheckpoint.ConsoleLogging"
 
+MODEL_CACHE_MEMORY_SETTING_ID = "MNeMiC.ModelLoading.CacheMemoryGB"
+DEFAULT_MODEL_CACHE_MEMORY_GB = 0
+
+IMAGE_SAVE_ENCODE_WORKERS_SETTING_ID = "MNeMiC.ImageSaving.EncodeWorkers"
+DEFAULT_IMAGE_SAVE_ENCODE_WORKERS = 0
+
 def get_comfy_setting(setting_id, default=None):
     """Read a value from the (default) user's comfy.settings.json.
 
@@ -64,6 +71,10 @@ def is_lora_console_log_enabled():
     return bool(get_comfy_setting(LORA_CONSOLE_LOG_SETTING_ID, False))
 
 
+def is_lora_fused_stack_cache_enabled():
+    return bool(get_comfy_setting(LORA_FUSED_STACK_CACHE_SETTING_ID, False))
+
+
 def is_wildcard_fuzzy_search_enabled():
     return bool(get_comfy_setting(WILDCARD_FUZZY_SEARCH_SETTING_ID, False))
 
@@ -122,3 +133,11 @@ def is_prompt_property_extractor_console_log_enabled():
 
 def is_load_random_checkpoint_console_log_enabled():
     return bool(get_comfy_setting(LOAD_RANDOM_CHECKPOINT_CONSOLE_LOG_SETTING_ID, False))
+
+
+def get_model_cache_memory_gb():
+    return get_comfy_int_setting(MODEL_CACHE_MEMORY_SETTING_ID, DEFAULT_MODEL_CACHE_MEMORY_GB)
+
+
+def get_image_save_encode_workers():
+    return get_comfy_int_setting(IMAGE_SAVE_ENCODE_WORKERS_SETTING_ID, DEFAULT_IMAGE_SAVE_ENCODE_WORKERS)
@@ -19,6 +19,14 @@ app.registerExtension({
       type: "boolean",
       defaultValue: false,
     },
+    {
+      id: "MNeMiC.LoRALoading.FusedStackCache",
+      name: "Fused stack cache",
+      category: ["⚡MNeMiC Nodes", "LoRA Loading", "Fused Stack Cache"],
+      tooltip: "When a prompt loads two or more LoRAs, merge the whole stack into one pre-computed patch and cache it on disk (ComfyUI user directory, mnemic_cache/fused_loras). Later prompts using the same LoRAs and strengths apply the cached patch instead of loading every LoRA again. A cached stack is about the size of its LoRA files together. Only plain LoRAs are fused; stacks with DoRA, LoHa, LoKr, OFT or other adapter types always load normally.",
+      type: "boolean",
+      defaultValue: false,
+    },
     {
       id: "MNeMiC.WildcardProcessing.ConsoleLogging",
       name: "Console logging",
@@ -146,5 +154,23 @@ app.registerExtension({
       type: "boolean",
       defaultValue: false,
     },
+    {
+      id: "MNeMiC.ModelLoading.CacheMemoryGB",
+      name: "Loaded model cache (GB)",
+      category: ["⚡MNeMiC Nodes", "Model Loading", "Loaded Model Cache"],
+      tooltip: "How much RAM (in GB, measured by file size) to spend keeping recently loaded checkpoints in memory, so Load Random Checkpoint and the <checkpoint:>, <clip:> and <vae:> tags of Prompt Property Extractor can reuse them instead of reading them from disk again. Models a node is still using are never dropped. Least recently used checkpoints are dropped first. The cached models are held outside ComfyUI's model management, so freeing memory in ComfyUI doesn't release them. 0 (the default) disables the cache.",
+      type: "number",
+      attrs: { min: 0, max: 256, step: 1 },
+      defaultValue: 0,
+    },
+    {
+      id: "MNeMiC.ImageSaving.EncodeWorkers",
+      name: "Encoding threads",
+      category: ["⚡MNeMiC Nodes", "Image Saving", "Encoding Threads"],
+      tooltip: "How many images Save Image With Metadata encodes at the same time. Each thread encodes and writes one image of the batch. 0 uses one thread per CPU core, up to 8.",
+      type: "number",
+      attrs: { min: 0, max: 64, step: 1 },
+      defaultValue: 0,
+    },
   ],
 });